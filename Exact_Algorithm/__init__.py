@@ -0,0 +1,17 @@
+"""
+Exact and heuristic solvers of the two dimensional job scheduling (strip packing) problem.
+
+Importing the package only loads the pure Python solver core. matplotlib is imported by draw_solution,
+numpy by the batch modules, OR-Tools and PuLP by the model engines of ModelSolution, and the demo runs
+from the command line:
+
+    python -m Exact_Algorithm demo --variant height_area --num 12 --repeat 100
+"""
+from .branching import PolicySolution, JOB_POLICIES, CORNER_POLICIES
+from .compact_solution import CompactSolution, SearchStopped
+from .heuristics import HeuristicSolution, HEURISTICS
+from .lower_bounds import BOUNDS
+from .model_solution import ModelSolution, ENGINES
+from .multi_resource import MultiResourceSolution
+from .search_engine import IterativeSolution
+from .skyline import Envelope
@@ -0,0 +1,3 @@
+from .branch_and_bound_main import main
+
+main()
@@ -0,0 +1,123 @@
+"""
+Vectorized generation and featurization of many instances at once, for building training sets.
+
+A batch of instances with the same number of jobs is an integer array of shape (batch, n, 2), holding
+(width, height) per job, so one instance is batch[k] and a job is batch[k, j]. Widths are drawn in
+[res_low, res_high] and heights in [time_low, time_high), like CompactSolution.gen_uniform_jobs.
+Random streams come from numpy.random.SeedSequence, so a seed always gives the same batches, and
+gen_batches() spawns one independent stream per chunk, so chunks can be generated in any order or in
+different processes.
+"""
+import numpy as np
+
+DISTRIBUTIONS = ('uniform', 'skewed', 'correlated')
+
+
+def scale(u, low, high):
+    """
+    :param u: array of floats in [0, 1)
+    :return: integers in [low, high], u mapped to equally wide intervals
+    """
+    return low + np.floor(u * (high - low + 1)).astype(np.int64)
+
+
+def gen_batch(batch, num, res_low, res_high, time_low, time_high, distribution='uniform', seed=None,
+              skew=2.0, correlation=0.7):
+    """
+    Generate a batch of instances.
+    :param batch: number of instances
+    :param num: number of jobs per instance
+    :param res_low: The smallest amount of resource that a job may request.
+    :param res_high: The biggest amount of resource that a job may request.
+    :param time_low: The smallest amount of time that a job may request.
+    :param time_high: One more than the biggest amount of time that a job may request.
+    :param distribution: one of DISTRIBUTIONS
+    - uniform: widths and heights independent and uniform.
+    - skewed: small jobs are more frequent, u ** skew is mapped onto each range.
+    - correlated: wide jobs tend to be long, width and height share a fraction correlation of their
+      random draw. Mixing two draws makes middle sizes more frequent than the ends of the ranges.
+    :param seed: int, numpy.random.SeedSequence or numpy.random.Generator, None for fresh entropy
+    :param skew: exponent of the skewed distribution, larger favours smaller jobs more
+    :param correlation: weight of the shared draw of the correlated distribution, between 0 and 1
+    :return: int64 array of shape (batch, num, 2)
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError('Unknown distribution %r, choose from %s' % (distribution, ', '.join(DISTRIBUTIONS)))
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    jobs = np.empty((batch, num, 2), dtype=np.int64)
+    if distribution == 'uniform':
+        jobs[..., 0] = rng.integers(res_low, res_high + 1, size=(batch, num))
+        jobs[..., 1] = rng.integers(time_low, time_high, size=(batch, num))
+    elif distribution == 'skewed':
+        u = rng.random((batch, num, 2)) ** skew
+        jobs[..., 0] = scale(u[..., 0], res_low, res_high)
+        jobs[..., 1] = scale(u[..., 1], time_low, time_high - 1)
+    else:
+        shared = rng.random((batch, num))
+        u = correlation * shared[..., None] + (1 - correlation) * rng.random((batch, num, 2))
+        jobs[..., 0] = scale(u[..., 0], res_low, res_high)
+        jobs[..., 1] = scale(u[..., 1], time_low, time_high - 1)
+    return jobs
+
+
+def gen_batches(total, chunk, num, res_low, res_high, time_low, time_high, distribution='uniform', seed=0,
+                **options):
+    """
+    Generate total instances in chunks, each from its own stream spawned from seed, so chunk k is the
+    same whatever the other chunks are used for.
+    :param total: number of instances
+    :param chunk: instances per yielded batch, the last one may be smaller
+    :param options: skew and correlation, see gen_batch()
+    :return: generator of arrays of shape (chunk, num, 2)
+    """
+    count = -(-total // chunk)
+    streams = np.random.SeedSequence(seed).spawn(count)
+    for k, stream in enumerate(streams):
+        size = min(chunk, total - k * chunk)
+        yield gen_batch(size, num, res_low, res_high, time_low, time_high, distribution,
+                        np.random.default_rng(stream), **options)
+
+
+def sort_batch(jobs):
+    """
+    Sort every instance like volume_sort: non-increasing heights, then areas, equal jobs keeping their
+    order.
+    :param jobs: array of shape (batch, n, 2)
+    :return: sorted copy of jobs
+    """
+    widths = jobs[..., 0]
+    heights = jobs[..., 1]
+    # lexsort is stable and sorts by the last key first
+    order = np.lexsort((-(widths * heights), -heights), axis=-1)
+    return np.take_along_axis(jobs, order[..., None], axis=-2)
+
+
+def batch_features(jobs, W):
+    """
+    Per-instance features computed over the whole batch.
+    :param jobs: array of shape (batch, n, 2)
+    :param W: Specify the maximum amount of resource
+    :return: dict of arrays of shape (batch,): total_area, area_bound (total area / W rounded up),
+    max_height, max_width, total_height and lower_bound (the larger of area_bound and max_height)
+    """
+    widths = jobs[..., 0]
+    heights = jobs[..., 1]
+    total_area = (widths * heights).sum(axis=-1)
+    area_bound = -(-total_area // W)
+    max_height = heights.max(axis=-1, initial=0)
+    return {
+        'total_area': total_area,
+        'area_bound': area_bound,
+        'max_height': max_height,
+        'max_width': widths.max(axis=-1, initial=0),
+        'total_height': heights.sum(axis=-1),
+        'lower_bound': np.maximum(area_bound, max_height),
+    }
+
+
+def to_job_lists(jobs):
+    """
+    :param jobs: array of shape (batch, n, 2)
+    :return: list of job lists as (width, height), the input of batch_solve.solve_instance()
+    """
+    return [[(int(w), int(h)) for w, h in instance] for instance in jobs]
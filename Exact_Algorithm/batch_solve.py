@@ -0,0 +1,144 @@
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from .compact_solution import CompactSolution
+
+
+class JsonLinesWriter:
+    """
+    Append solved instances to a text file, one JSON record per line.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: output file, opened in append mode so an interrupted run can be continued, '-' for
+        standard output
+        """
+        self.file = sys.stdout if path == '-' else open(path, 'a')
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + '\n')
+        # records come out one by one as they are solved, readers down a pipe shouldn't wait for a buffer
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def open_writer(path, max_jobs=None):
+    """
+    :param path: output file, binary (see binary_store.py) if it ends with .bin, JSON lines otherwise, '-'
+    for JSON lines on standard output
+    :param max_jobs: largest number of jobs per instance, needed for binary files
+    :return: writer with write(record) and close()
+    """
+    if path.endswith('.bin'):
+        if max_jobs is None:
+            raise ValueError('Binary output needs max_jobs, the largest number of jobs per instance')
+        from .binary_store import BinaryWriter
+        return BinaryWriter(path, max_jobs)
+    return JsonLinesWriter(path)
+
+
+def solve_instance(W, jobs, index=None):
+    """
+    Solve one instance exactly.
+    :param W: Specify the maximum amount of resource
+    :param jobs: list of (width, height)
+    :param index: identifier copied into the record
+    :return: record dict with 'id', 'W', 'jobs', 'optimal_height' and 'placements' in the order of jobs
+    """
+    solution = CompactSolution(W)
+    solution.load_jobs([{'width': w, 'height': h} for w, h in jobs])
+    solution.run_model()
+    return {
+        'id': index,
+        'W': W,
+        'jobs': [list(job) for job in jobs],
+        'optimal_height': solution.optimal_height,
+        'placements': [list(p) for p in solution.placements()],
+    }
+
+
+def solve_seed(W, seed, num, res_low, res_high, time_low, time_high):
+    """
+    Generate an instance with CompactSolution.gen_uniform_jobs from a seed and solve it. Generating in the
+    worker keeps the data sent to the pool down to a few integers per instance.
+    :return: record dict, see solve_instance(), with the seed as 'id'
+    """
+    solution = CompactSolution(W)
+    solution.gen_uniform_jobs(num, res_low, res_high, time_low, time_high, seed=seed)
+    jobs = [(job['width'], job['height']) for job in solution.jobs]
+    return solve_instance(W, jobs, seed)
+
+
+def stream_results(tasks, writer, workers=None, max_pending=None):
+    """
+    Run tasks on a process pool and write their records as soon as they finish. At most max_pending
+    tasks are in flight, so the task iterable is consumed lazily and may be arbitrarily long.
+    :param tasks: iterable of (function, args)
+    :param writer: object with a write(record) method
+    :param workers: number of processes, None for os.cpu_count()
+    :param max_pending: tasks submitted ahead of the writer, defaults to 4 per worker
+    :return: number of records written
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    written = 0
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for function, args in tasks:
+            pending.add(pool.submit(function, *args))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    writer.write(future.result())
+                    written += 1
+        for future in wait(pending).done:
+            writer.write(future.result())
+            written += 1
+    return written
+
+
+def solve_batch(instances, W, path, workers=None, max_jobs=None):
+    """
+    Solve many instances in parallel and stream (instance, optimal_height, placements) records to path.
+    :param instances: iterable of job lists, each a list of (width, height)
+    :param W: Specify the maximum amount of resource
+    :param path: output file, see open_writer()
+    :param workers: number of processes, None for os.cpu_count()
+    :param max_jobs: largest number of jobs per instance, required for a binary file so the instances
+    can stay a lazy stream
+    :return: number of records written
+    """
+    writer = open_writer(path, max_jobs)
+    try:
+        tasks = ((solve_instance, (W, jobs, k)) for k, jobs in enumerate(instances))
+        return stream_results(tasks, writer, workers)
+    finally:
+        writer.close()
+
+
+def solve_generated(count, num, res_low, res_high, time_low, time_high, W, path, seed=0, workers=None):
+    """
+    Generate count uniform instances with seeds seed, seed + 1, ... and solve them in parallel, so the
+    same labels can be rebuilt from the parameters alone.
+    :param count: number of instances
+    :param num: The number of jobs in each instance.
+    :param W: Specify the maximum amount of resource
+    :param path: output file, see open_writer()
+    :param seed: seed of the first instance
+    :param workers: number of processes, None for os.cpu_count()
+    :return: number of records written
+    """
+    writer = open_writer(path, num)
+    try:
+        tasks = (
+            (solve_seed, (W, s, num, res_low, res_high, time_low, time_high))
+            for s in range(seed, seed + count))
+        return stream_results(tasks, writer, workers)
+    finally:
+        writer.close()
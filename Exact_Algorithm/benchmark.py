@@ -0,0 +1,275 @@
+"""
+Benchmark of the solver variants on seeded instance families.
+
+Every family is a set of generator parameters (number of jobs, W and the width/height ranges of
+gen_uniform_jobs), and instance k of a family is generated from seed + k, so two runs, or two versions
+of the code, solve exactly the same instances. Only run_model is timed, with time.perf_counter; peak
+memory is measured in a separate run under tracemalloc, which slows the search down too much to time
+it at the same time. Results can be saved as JSON (with the per-instance times and heights) or CSV
+(one summary row per family and variant), and compare_results() flags the rows of a new run that got
+slower, expanded more nodes or found other heights than a saved one.
+
+    python -m Exact_Algorithm.benchmark --families n10_w8 n12_w8 --count 20 --json bench.json
+"""
+import argparse
+import csv
+import json
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+
+from . import no_early_stop, branch_and_bound_class, height_area_early_stop
+from .branching import PolicySolution
+from .compact_solution import CompactSolution
+from .search_engine import IterativeSolution
+
+FAMILIES = {
+    'n8_w8': {'num': 8, 'W': 8, 'res_low': 1, 'res_high': 4, 'time_low': 1, 'time_high': 5},
+    'n10_w8': {'num': 10, 'W': 8, 'res_low': 1, 'res_high': 4, 'time_low': 1, 'time_high': 5},
+    'n12_w8': {'num': 12, 'W': 8, 'res_low': 1, 'res_high': 4, 'time_low': 1, 'time_high': 5},
+    'n14_w8': {'num': 14, 'W': 8, 'res_low': 1, 'res_high': 4, 'time_low': 1, 'time_high': 5},
+    # narrow jobs, many of them side by side
+    'n12_w8_narrow': {'num': 12, 'W': 8, 'res_low': 1, 'res_high': 2, 'time_low': 1, 'time_high': 5},
+    # wide jobs, mostly stacked
+    'n12_w10_wide': {'num': 12, 'W': 10, 'res_low': 3, 'res_high': 7, 'time_low': 1, 'time_high': 5},
+    # long jobs on a wider strip
+    'n10_w12_tall': {'num': 10, 'W': 12, 'res_low': 1, 'res_high': 6, 'time_low': 1, 'time_high': 10},
+}
+
+STRONG_BOUNDS = ('tallest', 'continuous', 'mmv', 'dff')
+
+
+def iterative(order):
+    def factory(W):
+        return IterativeSolution(W, order=order)
+    return factory
+
+
+def policy(job_policy, corner_policy):
+    def factory(W):
+        return PolicySolution(W, job_policy, corner_policy)
+    return factory
+
+
+# name -> (factory W -> solver, keyword arguments of run_model, largest number of jobs it is run on)
+VARIANTS = {
+    'no_early_stop': (no_early_stop.ExactSolution, {}, 12),
+    'height_early_stop': (branch_and_bound_class.ExactSolution, {}, None),
+    'height_area_early_stop': (height_area_early_stop.ExactSolution, {}, None),
+    'compact': (CompactSolution, {}, None),
+    'compact_bounds': (CompactSolution, {'bounds': STRONG_BOUNDS}, None),
+    'compact_full': (CompactSolution, {'bounds': STRONG_BOUNDS, 'warm_start': True, 'memo_size': 100000,
+                                       'symmetry': True}, None),
+    'best_first': (iterative('best_first'), {'bounds': STRONG_BOUNDS, 'warm_start': True}, None),
+    'discrepancy': (iterative('discrepancy'), {'bounds': STRONG_BOUNDS, 'warm_start': True}, None),
+    'lowest_corner': (policy('static', 'lowest'), {'bounds': STRONG_BOUNDS}, None),
+}
+
+
+def gen_family(family, count, seed=0):
+    """
+    :param family: generator parameters, see FAMILIES
+    :param count: number of instances
+    :param seed: seed of the first instance, instance k uses seed + k
+    :return: list of job lists, jobs as (width, height)
+    """
+    generator = CompactSolution(family['W'])
+    instances = []
+    for k in range(count):
+        generator.gen_uniform_jobs(family['num'], family['res_low'], family['res_high'], family['time_low'],
+                                   family['time_high'], seed=seed + k)
+        instances.append([(job['width'], job['height']) for job in generator.jobs])
+    return instances
+
+
+def load_solver(factory, W, jobs):
+    solver = factory(W)
+    solver.jobs = [{'x': 0, 'y': 0, 'width': w, 'height': h} for w, h in jobs]
+    solver.volume_sort()
+    return solver
+
+
+def percentile(values, q):
+    """
+    :return: nearest-rank q-th percentile of values
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def run_variant(name, W, instances, memory_runs=3):
+    """
+    Solve every instance with one variant.
+    :param name: variant name, see VARIANTS
+    :param W: Specify the maximum amount of resource
+    :param instances: list of job lists, see gen_family()
+    :param memory_runs: number of instances solved a second time under tracemalloc
+    :return: dict of per-instance times, heights and node counts plus their summary
+    """
+    factory, options, max_num = VARIANTS[name]
+    times = []
+    heights = []
+    nodes = []
+    prune_counts = {}
+    for jobs in instances:
+        solver = load_solver(factory, W, jobs)
+        start_time = time.perf_counter()
+        solver.run_model(**options)
+        times.append(time.perf_counter() - start_time)
+        heights.append(solver.optimal_height)
+        # the original solvers don't count nodes
+        nodes.append(getattr(solver, 'nodes', None))
+        for bound, count in getattr(solver, 'prune_counts', {}).items():
+            prune_counts[bound] = prune_counts.get(bound, 0) + count
+    peak_memory = 0
+    for jobs in instances[:memory_runs]:
+        solver = load_solver(factory, W, jobs)
+        tracemalloc.start()
+        try:
+            solver.run_model(**options)
+            peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    counted = [count for count in nodes if count is not None]
+    return {
+        'variant': name,
+        'instances': len(instances),
+        'median_time': statistics.median(times),
+        'p95_time': percentile(times, 95),
+        'mean_time': statistics.mean(times),
+        'total_time': sum(times),
+        'mean_nodes': statistics.mean(counted) if counted else None,
+        'total_nodes': sum(counted) if counted else None,
+        'prune_counts': prune_counts,
+        'peak_memory': peak_memory,
+        'times': times,
+        'heights': heights,
+        'nodes': nodes,
+    }
+
+
+def run_benchmark(families=None, variants=None, count=20, seed=0, memory_runs=3, verbose=False):
+    """
+    Run every variant on every family.
+    :param families: family names, see FAMILIES, None for all
+    :param variants: variant names, see VARIANTS, None for all. Variants are skipped on families with
+    more jobs than they can solve in reasonable time.
+    :param count: instances per family
+    :param seed: seed of the first instance of every family
+    :param memory_runs: see run_variant()
+    :param verbose: print one line per result
+    :return: dict with the settings and a list of result rows
+    """
+    families = families or list(FAMILIES)
+    variants = variants or list(VARIANTS)
+    for name in families:
+        if name not in FAMILIES:
+            raise ValueError('Unknown family %r, choose from %s' % (name, ', '.join(FAMILIES)))
+    for name in variants:
+        if name not in VARIANTS:
+            raise ValueError('Unknown variant %r, choose from %s' % (name, ', '.join(VARIANTS)))
+    results = []
+    for family_name in families:
+        family = FAMILIES[family_name]
+        instances = gen_family(family, count, seed)
+        for name in variants:
+            max_num = VARIANTS[name][2]
+            if max_num is not None and family['num'] > max_num:
+                continue
+            row = run_variant(name, family['W'], instances, memory_runs)
+            row['family'] = family_name
+            row.update(family)
+            results.append(row)
+            if verbose:
+                print('%-14s %-24s median %.5fs  p95 %.5fs  nodes %s  peak %d B' % (
+                    family_name, name, row['median_time'], row['p95_time'], row['mean_nodes'],
+                    row['peak_memory']))
+    return {
+        'python': platform.python_version(),
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'count': count,
+        'seed': seed,
+        'results': results,
+    }
+
+
+SUMMARY_FIELDS = ['family', 'variant', 'num', 'W', 'res_low', 'res_high', 'time_low', 'time_high', 'instances',
+                  'median_time', 'p95_time', 'mean_time', 'total_time', 'mean_nodes', 'total_nodes',
+                  'peak_memory']
+
+
+def save_json(benchmark, path):
+    with open(path, 'w') as f:
+        json.dump(benchmark, f, indent=1)
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_csv(benchmark, path):
+    """
+    Write one summary row per family and variant, with a pruned_<name> column per prune reason.
+    :param benchmark: dict returned by run_benchmark()
+    :param path: output file
+    :return: None
+    """
+    reasons = sorted(set(reason for row in benchmark['results'] for reason in row['prune_counts']))
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(SUMMARY_FIELDS + ['pruned_' + reason for reason in reasons])
+        for row in benchmark['results']:
+            writer.writerow([row[field] for field in SUMMARY_FIELDS] +
+                            [row['prune_counts'].get(reason, '') for reason in reasons])
+
+
+def compare_results(old, new, tolerance=0.2):
+    """
+    Find regressions between two runs of run_benchmark() on the same families, count and seed.
+    :param old: baseline benchmark dict, e.g. from load_json()
+    :param new: benchmark dict of the version under test
+    :param tolerance: allowed relative increase of the median time
+    :return: list of (family, variant, message)
+    """
+    baseline = {(row['family'], row['variant']): row for row in old['results']}
+    regressions = []
+    for row in new['results']:
+        key = (row['family'], row['variant'])
+        if key not in baseline:
+            continue
+        before = baseline[key]
+        if row['heights'] != before['heights']:
+            changed = sum(a != b for a, b in zip(row['heights'], before['heights']))
+            regressions.append(key + ('%d heights changed' % changed,))
+        if row['median_time'] > before['median_time'] * (1 + tolerance):
+            regressions.append(key + ('median time %.5fs -> %.5fs' % (before['median_time'], row['median_time']),))
+        if row['total_nodes'] is not None and before['total_nodes'] is not None and \
+                row['total_nodes'] > before['total_nodes']:
+            regressions.append(key + ('nodes %d -> %d' % (before['total_nodes'], row['total_nodes']),))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the strip packing solvers on seeded instances.')
+    parser.add_argument('--families', nargs='+', choices=list(FAMILIES), help='default: all')
+    parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), help='default: all')
+    parser.add_argument('--count', type=int, default=20, help='instances per family')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory-runs', type=int, default=3, help='instances measured under tracemalloc')
+    parser.add_argument('--json', help='save the full results to this file')
+    parser.add_argument('--csv', help='save one summary row per family and variant to this file')
+    parser.add_argument('--baseline', help='JSON file of an earlier run to check for regressions')
+    args = parser.parse_args()
+
+    benchmark = run_benchmark(args.families, args.variants, args.count, args.seed, args.memory_runs,
+                              verbose=True)
+    if args.json:
+        save_json(benchmark, args.json)
+    if args.csv:
+        save_csv(benchmark, args.csv)
+    if args.baseline:
+        for family_name, name, message in compare_results(load_json(args.baseline), benchmark):
+            print('REGRESSION %s %s: %s' % (family_name, name, message))
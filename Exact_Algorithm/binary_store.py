@@ -0,0 +1,186 @@
+"""
+Compact binary file of solved instances, an alternative to the JSON lines of batch_solve.py for large
+training sets.
+
+The file is a 16 byte header followed by fixed-width little-endian records of record_dtype(max_jobs):
+    id          int64               instance identifier, -1 if none
+    W           int32               amount of resource
+    n           int32               number of jobs, at most max_jobs
+    height      int32               optimal height
+    jobs        int16 (max_jobs, 2) (width, height) of each job, zero padded after n
+    placements  int32 (max_jobs, 2) (x, y) of each job, zero padded after n
+Records are only ever appended to a file opened with O_APPEND, under an exclusive flock() so several
+processes can add to the same file without interleaving, even when a write() comes back short. A record
+cut short by a crash is dropped by the next writer while it holds the lock. open_records() maps the file
+with numpy.memmap, so reading fields such as records['jobs'] or records['height'] copies nothing, and it
+leaves out a trailing partial record.
+"""
+import os
+import struct
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # no file locks, e.g. on Windows: a single writer per file
+    fcntl = None
+
+MAGIC = b'JOBSCHD1'
+# magic, max_jobs, record size
+HEADER = struct.Struct('<8sII')
+HEADER_SIZE = HEADER.size
+
+
+def record_dtype(max_jobs):
+    """
+    :param max_jobs: largest number of jobs per instance the file can hold
+    :return: numpy structured dtype of one record, see the module docstring
+    """
+    return np.dtype([
+        ('id', '<i8'),
+        ('W', '<i4'),
+        ('n', '<i4'),
+        ('height', '<i4'),
+        ('jobs', '<i2', (max_jobs, 2)),
+        ('placements', '<i4', (max_jobs, 2)),
+    ])
+
+
+def read_header(path):
+    """
+    :param path: binary file
+    :return: max_jobs of the file
+    """
+    with open(path, 'rb') as f:
+        data = f.read(HEADER_SIZE)
+    if len(data) < HEADER_SIZE:
+        raise ValueError('%s is not a job scheduling binary file: header too short' % path)
+    magic, max_jobs, size = HEADER.unpack(data)
+    if magic != MAGIC or size != record_dtype(max_jobs).itemsize:
+        raise ValueError('%s is not a job scheduling binary file' % path)
+    return max_jobs
+
+
+class BinaryWriter:
+    """
+    Append solved instances to a binary file, with the same write(record) as JsonLinesWriter.
+    """
+
+    def __init__(self, path, max_jobs):
+        """
+        :param path: output file, created with a header if missing or empty, otherwise appended to
+        :param max_jobs: largest number of jobs per instance, must match the header of an existing file
+        """
+        self.dtype = record_dtype(max_jobs)
+        self.max_jobs = max_jobs
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # the first writer of an empty file adds the header
+            self.append(b'')
+            file_max_jobs = read_header(path)
+        except BaseException:
+            os.close(self.fd)
+            raise
+        if file_max_jobs != max_jobs:
+            os.close(self.fd)
+            raise ValueError('%s holds up to %d jobs per instance, not %d' % (path, file_max_jobs, max_jobs))
+
+    def append(self, data):
+        """
+        Write data at the end of the file in one piece. Other writers wait on the lock, so the size seen
+        here is final: the header is added to an empty file and, with file locks, a record cut short by a
+        crash is dropped, so the new ones stay aligned.
+        :param data: whole records
+        :return: None
+        """
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            size = os.fstat(self.fd).st_size
+            if size == 0:
+                data = HEADER.pack(MAGIC, self.max_jobs, self.dtype.itemsize) + data
+            elif data and size > HEADER_SIZE and fcntl is not None:
+                extra = (size - HEADER_SIZE) % self.dtype.itemsize
+                if extra:
+                    os.ftruncate(self.fd, size - extra)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self.fd, view):]
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def write(self, record):
+        """
+        :param record: dict with 'id', 'W', 'jobs', 'optimal_height' and 'placements', see
+        batch_solve.solve_instance()
+        :return: None
+        """
+        n = len(record['jobs'])
+        if n > self.max_jobs:
+            raise ValueError('Instance has %d jobs, the file holds at most %d' % (n, self.max_jobs))
+        if record['id'] is not None and not isinstance(record['id'], int):
+            raise ValueError('Binary records need integer ids, got %r' % (record['id'],))
+        placements = record['placements']
+        if placements is None or len(placements) != n or any(placement is None for placement in placements):
+            raise ValueError('Instance %r has no placement for every job' % (record['id'],))
+        # every value has to fit its field, numpy would raise or wrap silently
+        fields = [('id', [] if record['id'] is None else [record['id']]),
+                  ('W', [record['W']]), ('height', [record['optimal_height']]),
+                  ('jobs', [v for job in record['jobs'] for v in job]),
+                  ('placements', [v for placement in placements for v in placement])]
+        for name, values in fields:
+            info = np.iinfo(self.dtype[name].base)
+            for value in values:
+                if not isinstance(value, (int, np.integer)) or not info.min <= value <= info.max:
+                    raise ValueError('Instance %r: %s value %r does not fit a binary record'
+                                     % (record['id'], name, value))
+        row = np.zeros(1, dtype=self.dtype)
+        row['id'] = -1 if record['id'] is None else record['id']
+        row['W'] = record['W']
+        row['n'] = n
+        row['height'] = record['optimal_height']
+        if n:
+            row['jobs'][0, :n] = record['jobs']
+            row['placements'][0, :n] = placements
+        self.append(row.tobytes())
+
+    def write_array(self, records):
+        """
+        Append many records at once.
+        :param records: structured array of record_dtype(max_jobs)
+        :return: None
+        """
+        self.append(np.ascontiguousarray(records, dtype=self.dtype).tobytes())
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_records(path):
+    """
+    Map the records of a binary file without reading them.
+    :param path: binary file
+    :return: read-only numpy.memmap of record_dtype(max_jobs), one element per complete record
+    """
+    dtype = record_dtype(read_header(path))
+    count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def record_to_dict(record):
+    """
+    :param record: one element of open_records()
+    :return: dict in the format of batch_solve.solve_instance()
+    """
+    n = int(record['n'])
+    return {
+        'id': None if record['id'] == -1 else int(record['id']),
+        'W': int(record['W']),
+        'jobs': record['jobs'][:n].tolist(),
+        'optimal_height': int(record['height']),
+        'placements': record['placements'][:n].tolist(),
+    }
@@ -1,9 +1,6 @@
 import random
 import pprint
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
 import copy
-import time
 
 class ExactSolution:
     """
@@ -58,7 +55,7 @@ class ExactSolution:
 
     def pack_jobs(self, i, all_jobs):
         # early return if the packing is already higher than the current optimal height
-        if i is not 0:
+        if i != 0:
             highest_job = max(
                 all_jobs[:i],
                 key=lambda job: job['y'] + job['height'])
@@ -67,7 +64,7 @@ class ExactSolution:
                 return
 
             # Have packed all the jobs.
-            if i is len(all_jobs):
+            if i == len(all_jobs):
                 self.optimal_height = overall_height
                 self.optimal_jobs = copy.deepcopy(all_jobs)
                 return
@@ -77,7 +74,7 @@ class ExactSolution:
         # out_jobs could be empty [] when i is len-1
         # get the minimum width of the out jobs
         out_jobs = all_jobs[i:]
-        if len(out_jobs) is not 0:
+        if len(out_jobs) != 0:
             out_min_width = min(out_jobs, key=lambda job: job['width'])['width']
         else:
             out_min_width = 0
@@ -98,7 +95,7 @@ class ExactSolution:
         :param in_jobs: jobs in the bin
         :return: ordered jobs
         """
-        if len(in_jobs) is 0:
+        if len(in_jobs) == 0:
             return in_jobs
         jobs_ordered_yx = sorted(
             in_jobs,
@@ -115,7 +112,7 @@ class ExactSolution:
         :return: corner points in set
         """
         # if no job is scheduled, corner is (0,0) and return
-        if len(in_jobs) is 0:
+        if len(in_jobs) == 0:
             corners = [(0, 0)]
             return corners
 
@@ -147,12 +144,16 @@ class ExactSolution:
         pp.pprint(self.jobs)
 
     def print_solution(self):
-        print('\nOptimal height is:', solution.optimal_height, end='. ')
+        print('\nOptimal height is:', self.optimal_height, end='. ')
         print('Optimal jobs are: ')
         pp = pprint.PrettyPrinter(width=80)
         pp.pprint(self.optimal_jobs)
 
     def draw_solution(self):
+        # matplotlib is only needed for drawing, importing it up front slows down every solver process
+        import matplotlib.pyplot as plt
+        from matplotlib.patches import Rectangle
+
         fig, ax = plt.subplots(1)
         for job in self.optimal_jobs:
             x, y, w, h = job['x'], job['y'], job['width'], job['height']
@@ -163,33 +164,3 @@ class ExactSolution:
         plt.ylim((0, self.optimal_height + 5))
         plt.xlim((0, self.W))
         plt.show()
-
-
-solution = ExactSolution(W=8)
-# solution.gen_uniform_jobs(10, res_low=1, res_high=1, time_low=1, time_high=5)
-
-# solution.jobs.append({'x': 0, 'y': 0, 'width': 2, 'height': 2})
-# solution.jobs.append({'x': 0, 'y': 0, 'width': 1, 'height': 1})
-# solution.jobs.append({'x': 0, 'y': 0, 'width': 4, 'height': 3})
-# solution.jobs.append({'x': 0, 'y': 0, 'width': 4, 'height': 1})
-# solution.volume_sort()
-
-# height early stop
-total_time_1 = 0
-total_time_2 = 0
-for i in range(100):
-    start_time_1 = time.time()
-    solution.gen_uniform_jobs(12, res_low=1, res_high=1, time_low=1, time_high=5)
-    start_time_2 = time.time()
-    solution.run_model()
-    elapsed_time_1 = time.time() - start_time_1
-    elapsed_time_2 = time.time() - start_time_2
-    total_time_1 += elapsed_time_1
-    total_time_2 += elapsed_time_2
-print(total_time_1)
-print(total_time_2)
-
-# solution.run_model()
-# solution.print_jobs()
-# solution.print_solution()
-# solution.draw_solution()
@@ -1 +1,284 @@
-print('hello')
\ No newline at end of file
+"""
+Command line entry point, also run by python -m Exact_Algorithm.
+
+    solve   read instances from files or standard input and write one JSON record per solved instance
+            as soon as it is solved, e.g.
+                python -m Exact_Algorithm solve instances.jsonl --variant height_area --workers 4
+                cat instances.csv | python -m Exact_Algorithm solve --format csv -W 8 --time-limit 1
+    demo    time the solver on random instances, the loop that used to run on import
+
+Input formats, one instance per line:
+    jsonl   {"id": 3, "W": 8, "jobs": [[2, 3], [1, 4]]} or just [[2, 3], [1, 4]] with -W
+    csv     w1,h1,w2,h2,... with -W, or W,w1,h1,w2,h2,... (an odd number of values)
+    bin     a binary file of binary_store.py, read through a memory map, not from standard input
+Records keep the id of the instance (its position in the input if it has none) and come out in the
+order the instances are solved, which with several workers is not the input order.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+from . import no_early_stop, branch_and_bound_class, height_area_early_stop
+from .batch_solve import open_writer, stream_results
+from .compact_solution import CompactSolution
+from .model_solution import ModelSolution
+
+SOLVERS = {
+    'no_early_stop': no_early_stop.ExactSolution,
+    'height': branch_and_bound_class.ExactSolution,
+    'height_area': height_area_early_stop.ExactSolution,
+    'compact': CompactSolution,
+}
+
+# variants of the solve command: the original solver without pruning, CompactSolution with the
+# pruning of the other original solvers or all of its bounds, or a model engine of ModelSolution
+VARIANTS = {
+    'no_early_stop': None,
+    'height': {'bounds': ()},
+    'height_area': {'bounds': ('area',)},
+    'strong': {'bounds': ('tallest', 'continuous', 'mmv', 'dff'), 'symmetry': True, 'memo_size': 100000},
+    'cp_sat': {'engine': 'cp_sat'},
+    'milp': {'engine': 'milp'},
+}
+
+FORMATS = ('jsonl', 'csv', 'bin')
+
+
+def read_jsonl(lines, W=None):
+    """
+    :param lines: iterable of text lines
+    :param W: resource of the instances that don't give one
+    :return: generator of (id, W, jobs), jobs as (width, height)
+    """
+    for k, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        data = json.loads(line)
+        if isinstance(data, dict):
+            yield data.get('id', k), data.get('W', W), [tuple(job) for job in data['jobs']]
+        else:
+            yield k, W, [tuple(job) for job in data]
+
+
+def read_csv(lines, W=None):
+    """
+    :return: generator of (id, W, jobs), see read_jsonl()
+    """
+    for k, row in enumerate(csv.reader(lines)):
+        values = [int(value) for value in row if value.strip()]
+        if not values:
+            continue
+        row_W = W
+        if len(values) % 2:
+            row_W = values[0]
+            values = values[1:]
+        yield k, row_W, list(zip(values[0::2], values[1::2]))
+
+
+def read_binary(path):
+    """
+    :return: generator of (id, W, jobs), see read_jsonl()
+    """
+    from .binary_store import open_records, record_to_dict
+    for k, record in enumerate(open_records(path)):
+        record = record_to_dict(record)
+        yield (k if record['id'] is None else record['id']), record['W'], [tuple(job) for job in record['jobs']]
+
+
+def guess_format(path):
+    if path.endswith('.bin'):
+        return 'bin'
+    if path.endswith('.csv'):
+        return 'csv'
+    return 'jsonl'
+
+
+def read_instances(paths, fmt=None, W=None):
+    """
+    Read instances lazily, one file after the other.
+    :param paths: input files, '-' for standard input
+    :param fmt: one of FORMATS, None to guess it from the file name (jsonl for standard input)
+    :param W: resource of the instances that don't give one
+    :return: generator of (id, W, jobs)
+    """
+    for path in paths:
+        path_format = fmt or ('jsonl' if path == '-' else guess_format(path))
+        if path_format == 'bin':
+            if path == '-':
+                raise ValueError('Binary instances can not be read from standard input')
+            yield from check_instances(read_binary(path), path)
+            continue
+        reader = read_csv if path_format == 'csv' else read_jsonl
+        if path == '-':
+            yield from check_instances(reader(sys.stdin, W), path)
+            continue
+        with open(path, newline='') as file:
+            yield from check_instances(reader(file, W), path)
+
+
+def check_instances(instances, path):
+    """
+    :param instances: generator of (id, W, jobs) read from path
+    :return: the same instances, raising ValueError at the first one without W or with a job that does
+    not fit
+    """
+    for index, instance_W, jobs in instances:
+        if instance_W is None:
+            raise ValueError('Instance %r of %s has no W, give one with -W' % (index, path))
+        if not isinstance(instance_W, int) or instance_W < 1:
+            raise ValueError('Instance %r of %s: W must be a positive integer' % (index, path))
+        for job in jobs:
+            if not (len(job) == 2 and all(isinstance(v, int) for v in job)):
+                raise ValueError('Instance %r of %s: jobs must be [width, height] integers' % (index, path))
+            if not 1 <= job[0] <= instance_W or job[1] < 1:
+                raise ValueError('Instance %r of %s: job %r does not fit, widths must be in [1, W] and heights '
+                                 'positive' % (index, path, list(job)))
+        yield index, instance_W, jobs
+
+
+def solve_variant(W, jobs, index, variant, options):
+    """
+    Solve one instance, in a pool process or in the main one.
+    :param W: Specify the maximum amount of resource
+    :param jobs: list of (width, height)
+    :param index: identifier copied into the record
+    :param variant: one of VARIANTS
+    :param options: keyword arguments of CompactSolution.run_model() added to those of the variant
+    :return: record dict with 'id', 'W', 'jobs', 'optimal_height', 'placements' in the order of jobs and
+    'elapsed_time', plus 'stopped' and 'gap' for the CompactSolution variants
+    """
+    start_time = time.perf_counter()
+    if VARIANTS[variant] is None:
+        solution = no_early_stop.ExactSolution(W)
+        solution.jobs = [{'x': 0, 'y': 0, 'width': w, 'height': h} for w, h in jobs]
+        solution.volume_sort()
+        solution.run_model()
+        # the original solver keeps copies of jobs_sorted in their optimal place
+        optimal = {id(job): placed for job, placed in zip(solution.jobs_sorted, solution.optimal_jobs)}
+        placements = [(optimal[id(job)]['x'], optimal[id(job)]['y']) for job in solution.jobs]
+        extra = {}
+    else:
+        solution = ModelSolution(W) if 'engine' in VARIANTS[variant] else CompactSolution(W)
+        solution.load_jobs([{'width': w, 'height': h} for w, h in jobs])
+        solution.run_model(**dict(VARIANTS[variant], **options))
+        placements = solution.placements()
+        extra = {'stopped': solution.stopped, 'gap': solution.gap}
+    if solution.optimal_height == float('inf') or None in placements:
+        raise ValueError('Instance %r: no packing found' % (index,))
+    record = {
+        'id': index,
+        'W': W,
+        'jobs': [list(job) for job in jobs],
+        'optimal_height': solution.optimal_height,
+        'placements': [list(p) for p in placements],
+        'elapsed_time': time.perf_counter() - start_time,
+    }
+    record.update(extra)
+    return record
+
+
+def solve_command(args):
+    options = {}
+    if args.time_limit is not None:
+        options['time_limit'] = args.time_limit
+    if args.node_limit is not None:
+        options['node_limit'] = args.node_limit
+    if options:
+        if args.variant == 'no_early_stop':
+            raise ValueError('The no_early_stop variant has no budget, drop --time-limit and --node-limit')
+        # with a budget there is always a packing to return
+        options['warm_start'] = True
+    instances = read_instances(args.inputs or ['-'], args.format, args.W)
+    if args.output.endswith('.bin') and args.max_jobs is None:
+        raise ValueError('Binary output needs --max-jobs')
+    writer = open_writer(args.output, args.max_jobs)
+    try:
+        tasks = ((solve_variant, (W, jobs, index, args.variant, options)) for index, W, jobs in instances)
+        if args.workers > 1:
+            return stream_results(tasks, writer, args.workers)
+        written = 0
+        for function, task_args in tasks:
+            writer.write(function(*task_args))
+            written += 1
+        return written
+    finally:
+        writer.close()
+
+
+def demo(variant='height_area', W=8, num=12, res_low=1, res_high=4, time_low=1, time_high=5, repeat=1,
+         draw=False):
+    """
+    The timing loop that used to run when the solver modules were imported: solve repeat random
+    instances and print the total time with and without generating them. The last instance is printed,
+    and drawn if asked to.
+    :param variant: solver name, see SOLVERS
+    :param W: Specify the maximum amount of resource
+    :param num: The number of jobs waited to schedule.
+    :param repeat: number of instances
+    :param draw: draw the last solution with matplotlib
+    :return: the last solution
+    """
+    solution = SOLVERS[variant](W=W)
+    total_time_1 = 0
+    total_time_2 = 0
+    for i in range(repeat):
+        start_time_1 = time.perf_counter()
+        solution.gen_uniform_jobs(num, res_low=res_low, res_high=res_high, time_low=time_low, time_high=time_high)
+        start_time_2 = time.perf_counter()
+        solution.run_model()
+        total_time_1 += time.perf_counter() - start_time_1
+        total_time_2 += time.perf_counter() - start_time_2
+    solution.print_jobs()
+    solution.print_solution()
+    print('\n%d instances, %.4fs with generation, %.4fs solving' % (repeat, total_time_1, total_time_2))
+    if draw:
+        solution.draw_solution()
+    return solution
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m Exact_Algorithm',
+                                     description='Solve two dimensional job scheduling instances.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    solve = commands.add_parser('solve', help='solve instances from files or standard input')
+    solve.add_argument('inputs', nargs='*', help="input files, '-' or nothing for standard input")
+    solve.add_argument('--format', choices=FORMATS, help='input format, guessed from the file name by default')
+    solve.add_argument('-W', type=int, help='amount of resource of the instances that don\'t give one')
+    solve.add_argument('--variant', choices=list(VARIANTS), default='height_area')
+    solve.add_argument('--time-limit', type=float, help='seconds per instance, keep the best packing found')
+    solve.add_argument('--node-limit', type=int, help='nodes per instance, keep the best packing found')
+    solve.add_argument('--workers', type=int, default=1, help='instances solved in parallel')
+    solve.add_argument('-o', '--output', default='-', help="output file, .bin for binary, '-' for standard output")
+    solve.add_argument('--max-jobs', type=int, help='largest number of jobs per instance, for binary output')
+
+    demo_parser = commands.add_parser('demo', help='time the solver on random instances')
+    demo_parser.add_argument('--variant', choices=list(SOLVERS), default='height_area')
+    demo_parser.add_argument('-W', type=int, default=8, help='amount of resource')
+    demo_parser.add_argument('--num', type=int, default=12, help='jobs per instance')
+    demo_parser.add_argument('--res', type=int, nargs=2, default=(1, 4), metavar=('LOW', 'HIGH'),
+                             help='range of job widths')
+    demo_parser.add_argument('--time', type=int, nargs=2, default=(1, 5), metavar=('LOW', 'HIGH'),
+                             help='range of job heights, HIGH excluded')
+    demo_parser.add_argument('--repeat', type=int, default=1, help='number of instances to time')
+    demo_parser.add_argument('--draw', action='store_true', help='draw the last solution, needs matplotlib')
+
+    args = parser.parse_args(argv)
+    if args.command == 'demo':
+        demo(args.variant, args.W, args.num, args.res[0], args.res[1], args.time[0], args.time[1], args.repeat,
+             args.draw)
+        return
+    try:
+        solve_command(args)
+    except (ValueError, KeyError) as error:
+        parser.exit(2, 'error: %s\n' % error)
+    except BrokenPipeError:
+        # the reader of the pipe is gone, e.g. head
+        sys.stderr.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,392 @@
+"""
+Branching policies of the corner point search: which job is placed next and in which order its corner
+points are tried.
+
+Corner policies only change the order the children of a node are searched in, so the search still
+finds the same height, just with better packings earlier and fewer nodes after them. Job policies pick
+the next job among the remaining ones at every node instead of following jobs_sorted, which changes the
+tree itself: the search is then over other job orders and can end on another height.
+
+A learned model plugs in through ScoredCornerPolicy and ScoredJobPolicy: a function that takes a list
+of feature rows, one per candidate, in the order of CORNER_FEATURES or JOB_FEATURES, and returns one
+score per row, lowest first. A whole node is scored in one call, so a model can evaluate it as a
+single matrix.
+
+    python -m Exact_Algorithm.branching --families n10_w8 n12_w8 --count 20
+"""
+import argparse
+import time
+
+from .compact_solution import CompactSolution, SearchStopped
+
+CORNER_FEATURES = ('x', 'y', 'top', 'waste', 'envelope_height', 'depth')
+JOB_FEATURES = ('width', 'height', 'area', 'lowest_top', 'waste', 'depth')
+
+
+def waste(envelope, x, y, width, height):
+    """
+    :return: area the envelope grows by when a job goes on corner (x, y), besides the area of the job:
+    the gaps below it and left of it that no later job can use
+    """
+    area = envelope.area
+    envelope.place(x, y, width, height)
+    grown = envelope.area - area
+    envelope.undo()
+    return grown - width * height
+
+
+class BottomLeft:
+    """
+    The order of Envelope.corners(): left to right, so from the highest corner down.
+    """
+
+    name = 'bottom_left'
+
+    def order(self, solution, i, corners):
+        return corners
+
+
+class Lowest:
+    """
+    Lowest corner first, leftmost on ties.
+    """
+
+    name = 'lowest'
+
+    def order(self, solution, i, corners):
+        return sorted(corners, key=lambda corner: (corner[1], corner[0]))
+
+
+class BestFit:
+    """
+    Corner that wastes the least area below and left of the job first, then the lowest one.
+    """
+
+    name = 'best_fit'
+
+    def order(self, solution, i, corners):
+        envelope = solution.envelope
+        width = solution.widths[i]
+        height = solution.heights[i]
+        limit = solution.W - width
+        usable = [corner for corner in corners if corner[0] <= limit]
+        return sorted(usable, key=lambda corner: (waste(envelope, corner[0], corner[1], width, height),
+                                                   corner[1], corner[0]))
+
+
+class ScoredCornerPolicy:
+    """
+    Corner order from a scoring function, e.g. a trained model.
+    """
+
+    name = 'scored'
+
+    def __init__(self, score):
+        """
+        :param score: function of a list of rows of CORNER_FEATURES, one per corner, returning their scores
+        """
+        self.score = score
+
+    def order(self, solution, i, corners):
+        envelope = solution.envelope
+        width = solution.widths[i]
+        height = solution.heights[i]
+        limit = solution.W - width
+        usable = [corner for corner in corners if corner[0] <= limit]
+        if len(usable) < 2:
+            return usable
+        rows = [[x, y, y + height, waste(envelope, x, y, width, height), envelope.height, i] for x, y in usable]
+        scores = self.score(rows)
+        return [corner for score, k, corner in sorted(zip(scores, range(len(usable)), usable))]
+
+
+class StaticJobs:
+    """
+    The order of jobs_sorted: non-increasing heights then areas.
+    """
+
+    name = 'static'
+
+    def select(self, solution, i):
+        return i
+
+
+def job_candidates(solution, i):
+    """
+    :return: for every remaining job p, its row of JOB_FEATURES on the corner where it ends lowest, least
+    waste on ties
+    """
+    envelope = solution.envelope
+    rows = []
+    for p in range(i, solution.n):
+        width = solution.widths[p]
+        height = solution.heights[p]
+        best = None
+        for x, y in envelope.corners(solution.W - width):
+            fit = (y + height, waste(envelope, x, y, width, height))
+            if best is None or fit < best:
+                best = fit
+        rows.append([width, height, width * height, best[0], best[1], i])
+    return rows
+
+
+class BestFitJobs:
+    """
+    Job that wastes the least area on its lowest corner next, the largest one on ties, so the gaps of the
+    envelope are filled first.
+    """
+
+    name = 'best_fit'
+
+    def select(self, solution, i):
+        rows = job_candidates(solution, i)
+        return i + min(range(len(rows)), key=lambda k: (rows[k][4], -rows[k][2], rows[k][3]))
+
+
+class LowestTopJobs:
+    """
+    Job that can end lowest next, the largest one on ties.
+    """
+
+    name = 'lowest_top'
+
+    def select(self, solution, i):
+        rows = job_candidates(solution, i)
+        return i + min(range(len(rows)), key=lambda k: (rows[k][3], -rows[k][2]))
+
+
+class ScoredJobPolicy:
+    """
+    Next job from a scoring function, e.g. a trained model.
+    """
+
+    name = 'scored'
+
+    def __init__(self, score):
+        """
+        :param score: function of a list of rows of JOB_FEATURES, one per remaining job, returning their scores
+        """
+        self.score = score
+
+    def select(self, solution, i):
+        if i == solution.n - 1:
+            return i
+        scores = list(self.score(job_candidates(solution, i)))
+        return i + scores.index(min(scores))
+
+
+CORNER_POLICIES = {policy.name: policy for policy in (BottomLeft, Lowest, BestFit)}
+JOB_POLICIES = {policy.name: policy for policy in (StaticJobs, BestFitJobs, LowestTopJobs)}
+
+
+def make_policy(policy, policies):
+    """
+    :param policy: policy name or object
+    :param policies: CORNER_POLICIES or JOB_POLICIES
+    :return: policy object
+    """
+    if not isinstance(policy, str):
+        return policy
+    if policy not in policies:
+        raise ValueError('Unknown policy %r, choose from %s' % (policy, ', '.join(policies)))
+    return policies[policy]()
+
+
+class PolicySolution(CompactSolution):
+    """
+    CompactSolution with pluggable branching: job_policy picks the job placed at every node, corner_policy
+    orders its corner points. With the static job policy and bottom_left corners this is the search of
+    CompactSolution, node for node.
+
+    A dynamic job policy swaps the chosen job to position i of the arrays, so the remaining jobs are
+    still positions i..n-1, and refreshes the suffix data of the bounds for them. The memo, symmetry
+    breaking and parallel search assume the static order and are only available with it.
+    """
+
+    def __init__(self, W, job_policy='static', corner_policy='bottom_left'):
+        """
+        :param W: Specify the maximum amount of resource
+        :param job_policy: name in JOB_POLICIES or an object with select(solution, i)
+        :param corner_policy: name in CORNER_POLICIES or an object with order(solution, i, corners)
+        """
+        super().__init__(W)
+        self.job_policy = make_policy(job_policy, JOB_POLICIES)
+        self.corner_policy = make_policy(corner_policy, CORNER_POLICIES)
+        self.dynamic = not isinstance(self.job_policy, StaticJobs)
+        # index in jobs_sorted of the job at every position of the arrays
+        self.order = []
+
+    def load_arrays(self):
+        super().load_arrays()
+        self.order = list(range(self.n))
+
+    def prepare_search(self, bounds=('area',), memo_size=0, symmetry=False):
+        if self.dynamic and (memo_size or symmetry):
+            raise ValueError('The memo and symmetry breaking need the static job policy')
+        super().prepare_search(bounds, memo_size, symmetry)
+
+    def run_model(self, workers=1, **options):
+        """
+        Same as CompactSolution.run_model(), serial only.
+        """
+        if workers > 1:
+            raise ValueError('PolicySolution only runs the serial search, use workers=1')
+        super().run_model(**options)
+
+    def choose_job(self, i):
+        """
+        Move the job picked by the job policy to position i and bring the suffix data at i + 1 up to date.
+        :param i: index of the next job
+        :return: None
+        """
+        p = self.job_policy.select(self, i)
+        if p != i:
+            for values in (self.widths, self.heights, self.order):
+                values[i], values[p] = values[p], values[i]
+        self.suffix_area[i + 1] = self.suffix_area[i] - self.widths[i] * self.heights[i]
+        self.suffix_min_width[i + 1] = min(self.widths[i + 1:], default=0)
+        for bound in self.bounds:
+            bound.refresh(self, i + 1)
+
+    def update_optimal(self, overall_height):
+        """
+        Save the current placement in jobs_sorted order, whatever order the jobs were placed in.
+        """
+        self.optimal_height = overall_height
+        self.optimal_xs = [0] * self.n
+        self.optimal_ys = [0] * self.n
+        for p, k in enumerate(self.order):
+            self.optimal_xs[k] = self.xs[p]
+            self.optimal_ys[k] = self.ys[p]
+        self.improved()
+
+    def finish(self, frontier_bound):
+        # back to jobs_sorted order for optimal_jobs
+        self.widths = [job['width'] for job in self.jobs_sorted]
+        self.heights = [job['height'] for job in self.jobs_sorted]
+        self.order = list(range(self.n))
+        super().finish(frontier_bound)
+
+    def pack_jobs(self, i, overall_height):
+        """
+        Place the job chosen by the job policy at every feasible corner point, in the order of the corner
+        policy, then recurse on the next one. Same pruning as CompactSolution.pack_jobs().
+        :param i: number of jobs placed
+        :param overall_height: the highest end-point of the placed jobs
+        :return: None
+        """
+        envelope = self.envelope
+        self.nodes += 1
+        if self.nodes >= self.next_check and self.out_of_budget():
+            raise SearchStopped(self.node_bound(i, overall_height))
+        if i != 0:
+            if overall_height >= self.optimal_height:
+                self.prune_counts['height'] += 1
+                return
+            for bound in self.bounds:
+                if bound.node(self, i) >= self.optimal_height:
+                    self.prune_counts[bound.name] += 1
+                    return
+            if i == self.n:
+                self.update_optimal(overall_height)
+                return
+
+        if self.dynamic:
+            self.choose_job(i)
+        corners = envelope.corners(self.W - self.suffix_min_width[i])
+        if self.table is not None and not (self.symmetry and self.same_as_previous[i]) and \
+                self.table.seen(i, self.n, overall_height, corners):
+            self.prune_counts['memo'] += 1
+            return
+        if self.symmetry:
+            corners = self.symmetric_corners(i, corners)
+        corners = self.corner_policy.order(self, i, corners)
+        width = self.widths[i]
+        height = self.heights[i]
+        limit = self.W - width
+        k = 0
+        try:
+            for k, (x, y) in enumerate(corners):
+                if x <= limit:
+                    top = y + height
+                    self.xs[i] = x
+                    self.ys[i] = y
+                    envelope.place(x, y, width, height)
+                    self.pack_jobs(i + 1, top if top > overall_height else overall_height)
+                    envelope.undo()
+                    if self.optimal_height <= self.lower_bound:
+                        return
+        except SearchStopped as stop:
+            envelope.undo()
+            if any(x <= limit for x, y in corners[k + 1:]):
+                stop.frontier_bound = min(stop.frontier_bound, self.node_bound(i, overall_height))
+            raise
+
+
+def compare_policies(families=None, policies=None, count=20, seed=0, bounds=('area',), verbose=False):
+    """
+    Count the nodes of every branching policy on the benchmark families, against the static order with
+    bottom_left corners.
+    :param families: family names, see benchmark.FAMILIES, None for all up to 12 jobs
+    :param policies: list of (job policy, corner policy) names, None for every combination
+    :param count: instances per family
+    :param seed: seed of the first instance of every family
+    :param bounds: lower bounds of the search, see lower_bounds.BOUNDS
+    :param verbose: print one line per result
+    :return: list of dicts with the family, the policies, total nodes and time, the node reduction against
+    the static order and how many instances ended lower or higher than with it
+    """
+    from .benchmark import FAMILIES, gen_family
+    families = families or [name for name, family in FAMILIES.items() if family['num'] <= 12]
+    policies = policies or [(job, corner) for job in JOB_POLICIES for corner in CORNER_POLICIES]
+    if ('static', 'bottom_left') not in policies:
+        policies = [('static', 'bottom_left')] + list(policies)
+    rows = []
+    for family_name in families:
+        family = FAMILIES[family_name]
+        instances = gen_family(family, count, seed)
+        baseline = None
+        for job_policy, corner_policy in policies:
+            nodes = 0
+            heights = []
+            start_time = time.perf_counter()
+            for jobs in instances:
+                solution = PolicySolution(family['W'], job_policy, corner_policy)
+                solution.load_jobs([{'width': w, 'height': h} for w, h in jobs])
+                solution.run_model(bounds=bounds)
+                nodes += solution.nodes
+                heights.append(solution.optimal_height)
+            row = {
+                'family': family_name,
+                'job_policy': job_policy,
+                'corner_policy': corner_policy,
+                'nodes': nodes,
+                'time': time.perf_counter() - start_time,
+                'heights': heights,
+            }
+            if (job_policy, corner_policy) == ('static', 'bottom_left'):
+                baseline = row
+            rows.append(row)
+        for row in rows[-len(policies):]:
+            row['node_reduction'] = 1 - row['nodes'] / baseline['nodes'] if baseline['nodes'] else 0
+            row['lower'] = sum(a < b for a, b in zip(row['heights'], baseline['heights']))
+            row['higher'] = sum(a > b for a, b in zip(row['heights'], baseline['heights']))
+            if verbose:
+                print('%-14s %-11s %-12s nodes %9d  %+7.1f%%  %.3fs  lower %d  higher %d' % (
+                    row['family'], row['job_policy'], row['corner_policy'], row['nodes'],
+                    -100 * row['node_reduction'], row['time'], row['lower'], row['higher']))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the node counts of the branching policies.')
+    parser.add_argument('--families', nargs='+', help='benchmark families, default: all up to 12 jobs')
+    parser.add_argument('--jobs', nargs='+', choices=list(JOB_POLICIES), default=list(JOB_POLICIES))
+    parser.add_argument('--corners', nargs='+', choices=list(CORNER_POLICIES), default=list(CORNER_POLICIES))
+    parser.add_argument('--count', type=int, default=20, help='instances per family')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bounds', nargs='+', default=['area'], help='lower bounds, see lower_bounds.BOUNDS')
+    args = parser.parse_args()
+
+    compare_policies(args.families, [(job, corner) for job in args.jobs for corner in args.corners], args.count,
+                     args.seed, tuple(args.bounds), verbose=True)
@@ -0,0 +1,496 @@
+import random
+import pprint
+import time
+
+from .skyline import Envelope
+from .lower_bounds import make_bounds
+from .heuristics import HEURISTICS, run_heuristics
+from .transposition import TranspositionTable
+
+
+# nodes between two looks at the clock when run_model has a time limit
+CHECK_INTERVAL = 1024
+
+
+class SearchStopped(Exception):
+    """
+    Raised inside the search when the time or node budget of run_model runs out.
+    """
+
+    def __init__(self, frontier_bound):
+        """
+        :param frontier_bound: lower bound of every part of the tree that is left unexplored
+        """
+        super().__init__('search budget exhausted')
+        self.frontier_bound = frontier_bound
+
+
+class CompactSolution:
+    """
+    Array-backed version of the height + area early stop branch and bound in height_area_early_stop.py.
+    Widths, heights and placements live in preallocated integer lists indexed by the position of the
+    job in jobs_sorted, and are overwritten in place while descending, so no dict, slice or lambda is
+    touched on the hot path. Corner points and the packed area come from an incremental Envelope that is
+    rolled back on backtracking, instead of re-sorting the jobs in the bin at every node.
+    """
+
+    def __init__(self, W):
+        """
+        :param W: Specify the maximum amount of resource
+        """
+        self.W = W
+        self.jobs = []
+        self.jobs_sorted = []
+        self.optimal_height = float('inf')
+        self.optimal_jobs = []
+        # per-job arrays, filled by load_arrays() in jobs_sorted order
+        self.n = 0
+        self.widths = []
+        self.heights = []
+        self.xs = []
+        self.ys = []
+        self.envelope = Envelope(W)
+        # suffix_area[i] is the area of jobs i..n-1, suffix_min_width[i] their minimum width
+        self.suffix_area = []
+        self.suffix_min_width = []
+        self.optimal_xs = []
+        self.optimal_ys = []
+        # lower bounds tried at every node, see lower_bounds.py
+        self.bounds = make_bounds(('area',))
+        self.lower_bound = 0
+        self.nodes = 0
+        self.prune_counts = {}
+        self.symmetry = False
+        # memo of explored states, see transposition.py
+        self.table = None
+        # results of the warm start, name -> (height, placements, seconds)
+        self.heuristic_results = {}
+        # anytime search, see run_model()
+        self.on_improve = None
+        self.start_time = 0
+        self.elapsed_time = 0
+        self.deadline = None
+        self.node_limit = None
+        self.next_check = float('inf')
+        self.stopped = False
+        self.proven_lower_bound = 0
+        self.gap = 0
+
+    def gen_uniform_jobs(self, num, res_low, res_high, time_low, time_high, seed=None):
+        """
+        Generate uniform jobs according to four parameters, and save them into self.jobs
+        :param num: The number of jobs waited to schedule.
+        :param res_low: The smallest amount of resource that a job may request.
+        :param res_high: The biggest amount of resource that a job may request.
+        :param time_low: The smallest amount of time that a job may request.
+        :param time_high: The biggest amount of time that a job may request.
+        :param seed: seed of a private random generator, None uses the global one.
+        :return: None
+        """
+        rng = random if seed is None else random.Random(seed)
+        self.jobs = []
+        for i in range(num):
+            job = {'x': 0, 'y': 0}
+            job['width'] = rng.randrange(res_low, res_high + 1)
+            job['height'] = rng.randrange(time_low, time_high)
+            self.jobs.append(job)
+
+        self.volume_sort()
+
+    def load_jobs(self, jobs):
+        """
+        Use an existing list of jobs instead of generating them.
+        :param jobs: list of dicts with at least 'width' and 'height'
+        :return: None
+        """
+        self.jobs = [{'x': 0, 'y': 0, 'width': job['width'], 'height': job['height']} for job in jobs]
+        self.volume_sort()
+
+    def volume_sort(self):
+        """
+        Sort jobs according to non-increasing heights then areas, same order as ExactSolution.
+        :return: None
+        """
+        self.jobs_sorted = sorted(
+            self.jobs,
+            key=lambda job: (job['height'], job['width'] * job['height']),
+            reverse=True)
+
+    def load_arrays(self):
+        """
+        Copy jobs_sorted into the preallocated integer arrays used by pack_jobs.
+        :return: None
+        """
+        n = self.n = len(self.jobs_sorted)
+        self.widths = [job['width'] for job in self.jobs_sorted]
+        self.heights = [job['height'] for job in self.jobs_sorted]
+        self.xs = [0] * n
+        self.ys = [0] * n
+        self.envelope = Envelope(self.W)
+        self.suffix_area = [0] * (n + 1)
+        self.suffix_min_width = [0] * (n + 1)
+        # identical jobs are next to each other in jobs_sorted
+        self.same_as_previous = [0 < i < n and self.widths[i] == self.widths[i - 1] and
+                                 self.heights[i] == self.heights[i - 1] for i in range(n + 1)]
+        self.level_corners = [None] * n
+        for i in range(n - 1, -1, -1):
+            self.suffix_area[i] = self.suffix_area[i + 1] + self.widths[i] * self.heights[i]
+            if i == n - 1:
+                self.suffix_min_width[i] = self.widths[i]
+            else:
+                self.suffix_min_width[i] = min(self.widths[i], self.suffix_min_width[i + 1])
+
+    def prepare_search(self, bounds=('area',), memo_size=0, symmetry=False):
+        """
+        Build the lower bounds and the memo for the loaded jobs and reset the search counters.
+        :param bounds: bound names, see lower_bounds.BOUNDS
+        :param memo_size: number of explored states to remember, 0 turns the memo off
+        :param symmetry: skip corner points that lead to a packing searched elsewhere, see symmetric_corners()
+        :return: None
+        """
+        self.symmetry = symmetry
+        self.bounds = make_bounds(bounds)
+        self.lower_bound = max([bound.prepare(self) for bound in self.bounds], default=0)
+        self.table = TranspositionTable(memo_size) if memo_size else None
+        self.nodes = 0
+        self.prune_counts = dict.fromkeys(['height'] + [bound.name for bound in self.bounds], 0)
+        if self.table is not None:
+            self.prune_counts['memo'] = 0
+        if symmetry:
+            self.prune_counts['symmetry'] = 0
+
+    def warm_start(self, names):
+        """
+        Seed the incumbent with the best heuristic packing, so pruning starts before the first leaf.
+        :param names: heuristic names, see heuristics.HEURISTICS
+        :return: None
+        """
+        self.heuristic_results = run_heuristics(self.W, list(zip(self.widths, self.heights)), names)
+        height, placements, seconds = min(self.heuristic_results.values(), key=lambda result: result[0])
+        if height < self.optimal_height:
+            self.optimal_height = height
+            self.optimal_xs = [x for x, y in placements]
+            self.optimal_ys = [y for x, y in placements]
+            self.improved()
+
+    def set_budget(self, time_limit=None, node_limit=None):
+        """
+        Start the clock and limit the search, see run_model().
+        :param time_limit: seconds, None for no limit
+        :param node_limit: expanded nodes, None for no limit
+        :return: None
+        """
+        self.start_time = time.monotonic()
+        self.deadline = self.start_time + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        self.stopped = False
+        if node_limit is not None:
+            self.next_check = min(node_limit, CHECK_INTERVAL)
+        elif time_limit is not None:
+            self.next_check = 0
+        else:
+            self.next_check = float('inf')
+
+    def out_of_budget(self):
+        """
+        Called every CHECK_INTERVAL nodes while a budget is set.
+        :return: True if the search has to stop
+        """
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+        self.next_check = self.nodes + CHECK_INTERVAL
+        if self.node_limit is not None:
+            self.next_check = min(self.next_check, self.node_limit)
+        return False
+
+    def node_bound(self, i, overall_height):
+        """
+        Lower bound of the packings below the current node, from every selected bound.
+        :param i: index of the next job in jobs_sorted
+        :param overall_height: the highest end-point of jobs 0..i-1
+        :return: lower bound
+        """
+        if i == 0:
+            return self.lower_bound
+        return max([self.lower_bound, overall_height] + [bound.node(self, i) for bound in self.bounds])
+
+    def improved(self):
+        """
+        Called every time optimal_height goes down, fires the on_improve callback of run_model.
+        :return: None
+        """
+        if self.on_improve is not None:
+            self.on_improve(self.optimal_height, self.placements(), time.monotonic() - self.start_time)
+
+    def finish(self, frontier_bound):
+        """
+        Build optimal_jobs and the optimality gap once the search is over or stopped.
+        :param frontier_bound: lower bound of the unexplored part of the tree, optimal_height if none is left
+        :return: None
+        """
+        self.elapsed_time = time.monotonic() - self.start_time
+        self.proven_lower_bound = max(self.lower_bound, min(self.optimal_height, frontier_bound))
+        if self.optimal_height == float('inf'):
+            self.gap = float('inf')
+        elif self.optimal_height == 0:
+            self.gap = 0
+        else:
+            self.gap = (self.optimal_height - self.proven_lower_bound) / self.optimal_height
+        self.optimal_jobs = [
+            {'x': x, 'y': y, 'width': w, 'height': h}
+            for x, y, w, h in zip(self.optimal_xs, self.optimal_ys, self.widths, self.heights)]
+
+    def result(self):
+        """
+        :return: dict with the best height, its lower bound and gap, whether the search was stopped by its
+        budget, the search counters and the placement in the order of self.jobs
+        """
+        return {
+            'height': self.optimal_height,
+            'lower_bound': self.proven_lower_bound,
+            'gap': self.gap,
+            'stopped': self.stopped,
+            'elapsed_time': self.elapsed_time,
+            'nodes': self.nodes,
+            'prune_counts': dict(self.prune_counts),
+            'placements': self.placements(),
+        }
+
+    def run_model(self, workers=1, bounds=('area',), warm_start=None, memo_size=0, symmetry=False,
+                  time_limit=None, node_limit=None, on_improve=None):
+        """
+        Search the branch and bound tree and save the optimal packing into self.optimal_jobs
+        :param workers: number of processes, more than 1 splits the top of the tree over a process pool
+        :param bounds: lower bounds used to prune nodes, see lower_bounds.BOUNDS. The default is the
+        area early stop of height_area_early_stop.py, e.g. ('tallest', 'continuous', 'mmv', 'dff') prunes
+        much harder.
+        :param warm_start: heuristics run before the search to seed the incumbent, True for all of them,
+        see heuristics.HEURISTICS. The corner point search keeps the job order of jobs_sorted, so a
+        heuristic packing is occasionally lower than anything it can reach; it is then kept as the answer.
+        :param memo_size: remember up to this many explored states and prune repeated or dominated ones,
+        see transposition.py. Hit/miss counters are in self.table.stats().
+        :param symmetry: search identical jobs in one canonical order and only the lowest of the corner
+        points that lead to the same packing below, see symmetric_corners()
+        :param time_limit: stop after this many seconds and keep the best packing found so far
+        :param node_limit: stop after expanding this many nodes (per subproblem with workers)
+        :param on_improve: callback(height, placements, elapsed seconds) fired every time optimal_height
+        goes down, placements as in placements()
+        :return: None. With a budget, check self.stopped, self.proven_lower_bound and self.gap, measured
+        against what the corner point search can reach, or use result().
+        """
+        self.optimal_height = float('inf')
+        self.optimal_jobs = []
+        self.optimal_xs = []
+        self.optimal_ys = []
+        self.on_improve = on_improve
+        self.set_budget(time_limit, node_limit)
+        self.load_arrays()
+        self.prepare_search(bounds, memo_size, symmetry)
+        if self.n == 0:
+            self.optimal_height = 0
+            self.finish(0)
+            return
+        if warm_start:
+            self.warm_start(list(HEURISTICS) if warm_start is True else warm_start)
+        try:
+            if workers > 1:
+                from .parallel_search import solve_parallel
+                solve_parallel(self, workers, {'bounds': bounds, 'memo_size': memo_size, 'symmetry': symmetry})
+            else:
+                self.pack_jobs(0, 0)
+            frontier_bound = self.optimal_height
+        except SearchStopped as stop:
+            self.stopped = True
+            frontier_bound = stop.frontier_bound
+        self.finish(frontier_bound)
+
+    def pack_jobs(self, i, overall_height):
+        """
+        Place job i at every feasible corner point, then recurse on job i + 1.
+        :param i: index of the next job in jobs_sorted
+        :param overall_height: the highest end-point of jobs 0..i-1
+        :return: None
+        """
+        envelope = self.envelope
+        self.nodes += 1
+        if self.nodes >= self.next_check and self.out_of_budget():
+            raise SearchStopped(self.node_bound(i, overall_height))
+        if i != 0:
+            # early return if the packing is already higher than the current optimal height
+            if overall_height >= self.optimal_height:
+                self.prune_counts['height'] += 1
+                return
+            # early return if a lower bound of the packing below this node can't beat the optimal height
+            for bound in self.bounds:
+                if bound.node(self, i) >= self.optimal_height:
+                    self.prune_counts[bound.name] += 1
+                    return
+
+            # Have packed all the jobs.
+            if i == self.n:
+                self.update_optimal(overall_height)
+                return
+
+        corners = envelope.corners(self.W - self.suffix_min_width[i])
+        # early return if the same or a lower envelope was already explored at this depth. With symmetry
+        # breaking, only states at the start of a group of identical jobs are complete enough to compare.
+        if self.table is not None and not (self.symmetry and self.same_as_previous[i]) and \
+                self.table.seen(i, self.n, overall_height, corners):
+            self.prune_counts['memo'] += 1
+            return
+        if self.symmetry:
+            corners = self.symmetric_corners(i, corners)
+        width = self.widths[i]
+        height = self.heights[i]
+        limit = self.W - width
+        # try corner points recursively and obey depth first rule
+        try:
+            for x, y in corners:
+                if x <= limit:
+                    top = y + height
+                    self.xs[i] = x
+                    self.ys[i] = y
+                    envelope.place(x, y, width, height)
+                    self.pack_jobs(i + 1, top if top > overall_height else overall_height)
+                    envelope.undo()
+                    # the root lower bound is reached, nothing can do better
+                    if self.optimal_height <= self.lower_bound:
+                        return
+        except SearchStopped as stop:
+            envelope.undo()
+            # the corners after the one being searched are left too
+            left = corners[corners.index((self.xs[i], self.ys[i])) + 1:]
+            if any(x <= limit for x, y in left):
+                stop.frontier_bound = min(stop.frontier_bound, self.node_bound(i, overall_height))
+            raise
+
+    def symmetric_corners(self, i, corners):
+        """
+        Drop the corner points of job i that only lead to packings searched from another corner.
+        1. Identical jobs: if job i is the same as job i - 1, putting job i on a corner left of job i - 1
+        gives the same envelope as swapping the two, whenever the swapped order is also a corner
+        placement, i.e. the corner was already free for job i - 1 and job i ends left of it. Only the
+        swapped order, left to right, is searched.
+        2. Collapsed corners: a corner far enough right that job i covers every corner the next jobs can
+        still use gives the same envelope there as any other such corner, only higher, so only the
+        lowest of them (the rightmost) is kept. For the last job that is any corner.
+        Left/right mirror images need no extra rule: the first job always starts at (0, 0) and corner
+        points are bottom-left, so a mirrored packing is not a separate node of this tree.
+        Both rules are skipped where they would rely on each other.
+        :param i: index of the job to place
+        :param corners: corner points of the current envelope
+        :return: corner points to try, in increasing x
+        """
+        self.level_corners[i] = corners
+        width = self.widths[i]
+        limit = self.W - width
+        candidates = [corner for corner in corners if corner[0] <= limit]
+        tried = len(candidates)
+        if self.same_as_previous[i]:
+            x_previous = self.xs[i - 1]
+            previous = self.level_corners[i - 1]
+            candidates = [
+                (x, y) for x, y in candidates if x + width > x_previous or (x, y) not in previous]
+        if candidates and not self.same_as_previous[i + 1]:
+            if i + 1 < self.n:
+                collapse_from = self.W - self.suffix_min_width[i + 1] - width
+            else:
+                collapse_from = -1
+            if candidates[-1][0] > collapse_from:
+                candidates = [corner for corner in candidates if corner[0] <= collapse_from] + [candidates[-1]]
+        self.prune_counts['symmetry'] += tried - len(candidates)
+        return candidates
+
+    def update_optimal(self, overall_height):
+        """
+        Save the current placement as the best one found so far.
+        :param overall_height: height of the current packing
+        :return: None
+        """
+        self.optimal_height = overall_height
+        self.optimal_xs = self.xs[:]
+        self.optimal_ys = self.ys[:]
+        self.improved()
+
+    def place_prefix(self, prefix):
+        """
+        Put jobs 0..len(prefix)-1 on the given corner points, as if pack_jobs had descended to them.
+        :param prefix: list of (x, y), one per job in jobs_sorted order
+        :return: the highest end-point of the placed jobs
+        """
+        for i, (x, y) in enumerate(prefix):
+            if self.symmetry:
+                self.level_corners[i] = self.envelope.corners(self.W - self.suffix_min_width[i])
+            self.xs[i] = x
+            self.ys[i] = y
+            self.envelope.place(x, y, self.widths[i], self.heights[i])
+        return self.envelope.height
+
+    def subproblems(self, depth):
+        """
+        Enumerate the nodes of the tree at the given depth, i.e. every feasible placement of the first
+        depth jobs, in the order pack_jobs would visit them.
+        :param depth: number of jobs to place, smaller than the number of jobs
+        :return: list of prefixes, see place_prefix()
+        """
+        prefixes = []
+        envelope = self.envelope
+
+        def descend(i):
+            if i == depth:
+                prefixes.append(list(zip(self.xs[:i], self.ys[:i])))
+                return
+            width = self.widths[i]
+            corners = envelope.corners(self.W - self.suffix_min_width[i])
+            if self.symmetry:
+                corners = self.symmetric_corners(i, corners)
+            for x, y in corners:
+                if x > self.W - width:
+                    continue
+                self.xs[i] = x
+                self.ys[i] = y
+                envelope.place(x, y, width, self.heights[i])
+                descend(i + 1)
+                envelope.undo()
+
+        descend(0)
+        return prefixes
+
+    def placements(self):
+        """
+        Optimal placement of every job, in the order of self.jobs rather than jobs_sorted.
+        :return: list of (x, y)
+        """
+        position = {id(job): k for k, job in enumerate(self.jobs)}
+        placements = [None] * len(self.jobs)
+        for job, x, y in zip(self.jobs_sorted, self.optimal_xs, self.optimal_ys):
+            placements[position[id(job)]] = (x, y)
+        return placements
+
+    def print_jobs(self):
+        print('Generated jobs are: ')
+        pp = pprint.PrettyPrinter(width=80)
+        pp.pprint(self.jobs)
+
+    def print_solution(self):
+        print('\nOptimal height is:', self.optimal_height, end='. ')
+        print('Optimal jobs are: ')
+        pp = pprint.PrettyPrinter(width=80)
+        pp.pprint(self.optimal_jobs)
+
+    def draw_solution(self):
+        # matplotlib is only needed for drawing, importing it up front slows down every solver process
+        import matplotlib.pyplot as plt
+        from matplotlib.patches import Rectangle
+
+        fig, ax = plt.subplots(1)
+        for job in self.optimal_jobs:
+            rect = Rectangle(
+                (job['x'], job['y']), job['width'], job['height'], facecolor='red', alpha=0.5, edgecolor='black')
+            ax.add_patch(rect)
+
+        plt.ylim((0, self.optimal_height + 5))
+        plt.xlim((0, self.W))
+        plt.show()
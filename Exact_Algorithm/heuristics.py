@@ -0,0 +1,187 @@
+import pprint
+import time
+
+
+def decreasing_height(jobs):
+    """
+    :param jobs: list of (width, height)
+    :return: indices of jobs by non-increasing height, then width
+    """
+    return sorted(range(len(jobs)), key=lambda k: (jobs[k][1], jobs[k][0]), reverse=True)
+
+
+def bottom_left(W, jobs):
+    """
+    Bottom-left fill: take jobs by decreasing height and put each one at the lowest, then leftmost,
+    position where it fits, holes under higher jobs included.
+    :param W: Specify the maximum amount of resource
+    :param jobs: list of (width, height)
+    :return: (height, placements), placements is a list of (x, y) in the order of jobs
+    """
+    placements = [None] * len(jobs)
+    placed = []
+    for k in decreasing_height(jobs):
+        w, h = jobs[k]
+        xs = sorted(set([0] + [x + pw for x, y, pw, ph in placed]))
+        ys = sorted(set([0] + [y + ph for x, y, pw, ph in placed]))
+        found = False
+        for y in ys:
+            for x in xs:
+                if x + w > W:
+                    break
+                if all(x + w <= px or px + pw <= x or y + h <= py or py + ph <= y for px, py, pw, ph in placed):
+                    found = True
+                    break
+            if found:
+                break
+        placed.append((x, y, w, h))
+        placements[k] = (x, y)
+    return max([y + h for x, y, w, h in placed], default=0), placements
+
+
+def next_fit_decreasing_height(W, jobs):
+    """
+    NFDH: fill shelves left to right by decreasing height and open a new shelf on top of the current
+    one as soon as a job doesn't fit.
+    :param W: Specify the maximum amount of resource
+    :param jobs: list of (width, height)
+    :return: (height, placements), see bottom_left()
+    """
+    placements = [None] * len(jobs)
+    shelf_y = shelf_height = x = 0
+    for k in decreasing_height(jobs):
+        w, h = jobs[k]
+        if x + w > W:
+            shelf_y += shelf_height
+            shelf_height = x = 0
+        if x == 0:
+            shelf_height = h
+        placements[k] = (x, shelf_y)
+        x += w
+    return shelf_y + shelf_height, placements
+
+
+def first_fit_decreasing_height(W, jobs):
+    """
+    FFDH: like NFDH, but each job goes on the lowest shelf that still has room for it.
+    :param W: Specify the maximum amount of resource
+    :param jobs: list of (width, height)
+    :return: (height, placements), see bottom_left()
+    """
+    placements = [None] * len(jobs)
+    # shelves as [y, height, used width]
+    shelves = []
+    for k in decreasing_height(jobs):
+        w, h = jobs[k]
+        for shelf in shelves:
+            if shelf[2] + w <= W:
+                break
+        else:
+            y = shelves[-1][0] + shelves[-1][1] if shelves else 0
+            shelf = [y, h, 0]
+            shelves.append(shelf)
+        placements[k] = (shelf[2], shelf[0])
+        shelf[2] += w
+    return (shelves[-1][0] + shelves[-1][1]) if shelves else 0, placements
+
+
+def skyline_best_fit(W, jobs):
+    """
+    Skyline best fit: keep the height of every resource unit, and put each job (by decreasing height)
+    where it ends lowest, breaking ties by the smallest wasted area below it, then leftmost.
+    :param W: Specify the maximum amount of resource
+    :param jobs: list of (width, height)
+    :return: (height, placements), see bottom_left()
+    """
+    placements = [None] * len(jobs)
+    skyline = [0] * W
+    for k in decreasing_height(jobs):
+        w, h = jobs[k]
+        best = None
+        for x in range(W - w + 1):
+            y = max(skyline[x:x + w])
+            waste = sum(y - s for s in skyline[x:x + w])
+            if best is None or (y, waste) < best[:2]:
+                best = (y, waste, x)
+        y, waste, x = best
+        skyline[x:x + w] = [y + h] * w
+        placements[k] = (x, y)
+    return max(skyline, default=0), placements
+
+
+HEURISTICS = {
+    'bottom_left': bottom_left,
+    'nfdh': next_fit_decreasing_height,
+    'ffdh': first_fit_decreasing_height,
+    'skyline': skyline_best_fit,
+}
+
+
+def get_heuristic(name):
+    """
+    :param name: heuristic name, see HEURISTICS
+    :return: the heuristic function
+    """
+    if name not in HEURISTICS:
+        raise ValueError('Unknown heuristic %r, choose from %s' % (name, ', '.join(HEURISTICS)))
+    return HEURISTICS[name]
+
+
+def run_heuristics(W, jobs, names=None):
+    """
+    Run several heuristics on the same jobs and time each of them.
+    :param W: Specify the maximum amount of resource
+    :param jobs: list of (width, height)
+    :param names: heuristic names, see HEURISTICS, None for all
+    :return: dict of name -> (height, placements, seconds)
+    """
+    results = {}
+    for name in names or HEURISTICS:
+        heuristic = get_heuristic(name)
+        start_time = time.perf_counter()
+        height, placements = heuristic(W, jobs)
+        results[name] = (height, placements, time.perf_counter() - start_time)
+    return results
+
+
+class HeuristicSolution:
+    """
+    Schedule jobs with one classic heuristic, with the same attributes as ExactSolution so the two can
+    be compared on the same instances.
+    """
+
+    def __init__(self, W, method='skyline'):
+        """
+        :param W: Specify the maximum amount of resource
+        :param method: heuristic name, see HEURISTICS
+        """
+        get_heuristic(method)
+        self.W = W
+        self.method = method
+        self.jobs = []
+        self.optimal_height = float('inf')
+        self.optimal_jobs = []
+        self.elapsed_time = 0
+
+    def load_jobs(self, jobs):
+        """
+        :param jobs: list of dicts with at least 'width' and 'height'
+        :return: None
+        """
+        self.jobs = [{'x': 0, 'y': 0, 'width': job['width'], 'height': job['height']} for job in jobs]
+
+    def run_model(self):
+        heuristic = get_heuristic(self.method)
+        start_time = time.perf_counter()
+        self.optimal_height, placements = heuristic(
+            self.W, [(job['width'], job['height']) for job in self.jobs])
+        self.elapsed_time = time.perf_counter() - start_time
+        self.optimal_jobs = [
+            {'x': x, 'y': y, 'width': job['width'], 'height': job['height']}
+            for job, (x, y) in zip(self.jobs, placements)]
+
+    def print_solution(self):
+        print('\n%s height is:' % self.method, self.optimal_height, end='. ')
+        print('Jobs are: ')
+        pp = pprint.PrettyPrinter(width=80)
+        pp.pprint(self.optimal_jobs)
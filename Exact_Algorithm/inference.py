@@ -0,0 +1,274 @@
+"""
+Approximate scheduling of large batches on the CPU, the consumer of the neural network of the README.
+
+A model scores every job of a batch of instances at once, the scores give the order the jobs are
+placed in, and a vectorized skyline placer packs the whole batch in that order: each job goes where
+it ends lowest, then on the least wasted area, then leftmost, like heuristics.skyline_best_fit. The
+height of every packing is compared with the cheap lower bound of batch_instances.batch_features(),
+and only instances whose gap is larger than max_gap are solved again with the exact search.
+
+Batches are arrays of shape (batch, n, 2) as made by batch_instances.gen_batch(). Instances with fewer
+jobs are padded with zero-width jobs, which are left out of the packing, the features and the lower
+bounds, whatever their height.
+
+    python -m Exact_Algorithm.inference --batch 10000 --num 20 -W 16
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .batch_instances import batch_features, gen_batch
+from .compact_solution import CompactSolution
+
+JOB_FEATURES = ('width', 'height', 'area', 'height_share', 'area_share', 'bias')
+
+# order of volume_sort: taller jobs first, then larger ones, as long as heights are below a million
+DEFAULT_WEIGHTS = (0.0, -1.0, -1e-6, 0.0, 0.0, 0.0)
+
+
+def drop_padding(jobs):
+    """
+    :param jobs: int array of shape (batch, n, 2)
+    :return: the same jobs with the height of every zero-width padding job set to 0
+    """
+    return np.where((jobs[..., 0] > 0)[..., None], jobs, 0)
+
+
+def job_features(jobs, W):
+    """
+    :param jobs: int array of shape (batch, n, 2)
+    :param W: Specify the maximum amount of resource
+    :return: float array of shape (batch, n, len(JOB_FEATURES)): width / W, height and area relative to
+    the tallest job, share of the total height and of the total area, and a constant 1
+    """
+    jobs = drop_padding(jobs)
+    widths = jobs[..., 0].astype(np.float64)
+    heights = jobs[..., 1].astype(np.float64)
+    areas = widths * heights
+    max_height = np.maximum(heights.max(axis=-1, keepdims=True, initial=0), 1)
+    total_height = np.maximum(heights.sum(axis=-1, keepdims=True), 1)
+    total_area = np.maximum(areas.sum(axis=-1, keepdims=True), 1)
+    return np.stack([widths / W, heights / max_height, areas / (W * max_height), heights / total_height,
+                     areas / total_area, np.ones_like(widths)], axis=-1)
+
+
+class LinearOrderModel:
+    """
+    Scores jobs with a linear function of JOB_FEATURES, the lowest score is placed first. The default
+    weights give the order of volume_sort, fit() learns weights that imitate the exact search. Any object
+    with the same predict() can be used by InferenceScheduler instead, e.g. a trained network.
+    """
+
+    def __init__(self, weights=DEFAULT_WEIGHTS):
+        """
+        :param weights: one weight per feature of JOB_FEATURES
+        """
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+    def predict(self, features):
+        """
+        :param features: array of shape (batch, n, len(JOB_FEATURES)), see job_features()
+        :return: scores of shape (batch, n)
+        """
+        return features @ self.weights
+
+    def fit(self, jobs, W, **options):
+        """
+        Least squares fit of the rank of every job in the exact packing, by start time then x.
+        :param jobs: int array of shape (batch, n, 2), without padding
+        :param W: Specify the maximum amount of resource
+        :param options: keyword arguments of CompactSolution.run_model()
+        :return: self
+        """
+        targets = np.empty(jobs.shape[:2])
+        n = jobs.shape[1]
+        for b, instance in enumerate(jobs):
+            solution = CompactSolution(W)
+            solution.load_jobs([{'width': int(w), 'height': int(h)} for w, h in instance])
+            solution.run_model(**options)
+            placements = solution.placements()
+            order = sorted(range(n), key=lambda k: (placements[k][1], placements[k][0]))
+            targets[b, order] = np.arange(n) / max(n - 1, 1)
+        features = job_features(jobs, W).reshape(-1, len(JOB_FEATURES))
+        self.weights = np.linalg.lstsq(features, targets.reshape(-1), rcond=None)[0]
+        return self
+
+    def save(self, path):
+        np.savez(path, weights=self.weights)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['weights'])
+
+
+def predict_order(model, jobs, W):
+    """
+    :return: int array of shape (batch, n), the jobs of every instance by increasing score, padding last
+    """
+    scores = np.asarray(model.predict(job_features(jobs, W)), dtype=np.float64)
+    scores = np.where(jobs[..., 0] > 0, scores, np.inf)
+    return np.argsort(scores, axis=-1, kind='stable')
+
+
+def skyline_place(jobs, order, W):
+    """
+    Pack every instance of the batch in its order on a skyline of W unit columns, one job of every
+    instance per step.
+    :param jobs: int array of shape (batch, n, 2)
+    :param order: int array of shape (batch, n), see predict_order()
+    :param W: Specify the maximum amount of resource
+    :return: (heights, placements), arrays of shape (batch,) and (batch, n, 2) holding (x, y) per job
+    """
+    batch, n = jobs.shape[:2]
+    rows = np.arange(batch)
+    columns = np.arange(W)
+    skyline = np.zeros((batch, W), dtype=np.int64)
+    placements = np.zeros((batch, n, 2), dtype=np.int64)
+    for t in range(n):
+        k = order[:, t]
+        widths = jobs[rows, k, 0]
+        heights = jobs[rows, k, 1]
+        active = widths > 0
+        # start of a job of every width at every x: the highest column below it, grown one column at a
+        # time and read off for the instances whose job is that wide
+        window = skyline.copy()
+        starts = np.zeros_like(skyline)
+        for width in range(1, int(widths.max(initial=0)) + 1):
+            if width > 1:
+                window[:, :W - width + 1] = np.maximum(window[:, :W - width + 1], skyline[:, width - 1:])
+            selected = widths == width
+            starts[selected] = window[selected]
+        fits = columns[None, :] <= (W - widths)[:, None]
+        # area wasted below the job: its width times its start minus the skyline under it
+        cumulative = np.concatenate([np.zeros((batch, 1), dtype=np.int64), np.cumsum(skyline, axis=1)], axis=1)
+        ends = np.minimum(columns[None, :] + widths[:, None], W)
+        waste = widths[:, None] * starts - (np.take_along_axis(cumulative, ends, axis=1) - cumulative[:, :W])
+        big = np.iinfo(np.int64).max
+        starts = np.where(fits, starts, big)
+        lowest = starts.min(axis=1)
+        waste = np.where(starts == lowest[:, None], waste, big)
+        x = np.argmin(waste, axis=1)
+        y = lowest
+        x = np.where(active, x, 0)
+        y = np.where(active, y, 0)
+        placements[rows, k, 0] = x
+        placements[rows, k, 1] = y
+        covered = (columns[None, :] >= x[:, None]) & (columns[None, :] < (x + widths)[:, None]) & active[:, None]
+        skyline = np.where(covered, (y + heights)[:, None], skyline)
+    return skyline.max(axis=1, initial=0), placements
+
+
+def solve_exact(W, instance, bounds, time_limit):
+    """
+    Fallback of InferenceScheduler, at module level so pool processes can run it.
+    :param W: Specify the maximum amount of resource
+    :param instance: int array of shape (n, 2), padding included
+    :param bounds: lower bounds of the search, see lower_bounds.BOUNDS
+    :param time_limit: seconds, None for no limit
+    :return: (height, placements) of the exact search, placements of shape (n, 2)
+    """
+    jobs = [(int(w), int(h)) for w, h in instance if w > 0]
+    solution = CompactSolution(W)
+    solution.load_jobs([{'width': w, 'height': h} for w, h in jobs])
+    # the heuristics give a packing even if the time limit stops the search early
+    solution.run_model(bounds=bounds, warm_start=True, time_limit=time_limit)
+    placements = np.zeros((len(instance), 2), dtype=np.int64)
+    placements[instance[:, 0] > 0] = solution.placements()
+    return solution.optimal_height, placements
+
+
+class InferenceScheduler:
+    """
+    Schedules batches with a model and the vectorized skyline placer, and falls back to the exact search
+    for the instances the placer leaves too far above the lower bound.
+    """
+
+    def __init__(self, W, model=None, max_gap=0.1, bounds=('tallest', 'continuous', 'mmv'), time_limit=None,
+                 workers=1):
+        """
+        :param W: Specify the maximum amount of resource
+        :param model: object with predict(features), see LinearOrderModel, None for the default order
+        :param max_gap: largest accepted (height - lower bound) / height, None to never fall back
+        :param bounds: lower bounds of the exact search, see lower_bounds.BOUNDS
+        :param time_limit: seconds of the exact search per instance, None for no limit
+        :param workers: processes running the exact searches of a batch
+        """
+        self.W = W
+        self.model = model or LinearOrderModel()
+        self.max_gap = max_gap
+        self.bounds = bounds
+        self.time_limit = time_limit
+        self.workers = workers
+
+    def schedule(self, jobs):
+        """
+        :param jobs: int array of shape (batch, n, 2), zero widths for padding
+        :return: dict of arrays over the batch: 'heights', 'placements' (batch, n, 2), 'orders' (batch, n),
+        'lower_bounds', 'gaps' of the placer packings and 'fallback', True where the exact search ran
+        """
+        jobs = np.asarray(jobs, dtype=np.int64)
+        if jobs[..., 0].max(initial=0) > self.W:
+            raise ValueError('Jobs wider than W=%d can not be packed' % self.W)
+        orders = predict_order(self.model, jobs, self.W)
+        heights, placements = skyline_place(jobs, orders, self.W)
+        lower_bounds = batch_features(drop_padding(jobs), self.W)['lower_bound']
+        gaps = np.where(heights > 0, (heights - lower_bounds) / np.maximum(heights, 1), 0.0)
+        fallback = np.zeros(len(jobs), dtype=bool)
+        if self.max_gap is not None:
+            fallback = gaps > self.max_gap
+            indices = np.flatnonzero(fallback)
+            args = ([self.W] * len(indices), jobs[indices], [self.bounds] * len(indices),
+                    [self.time_limit] * len(indices))
+            if self.workers > 1 and len(indices) > 1:
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    exact = list(pool.map(solve_exact, *args, chunksize=max(1, len(indices) // (4 * self.workers))))
+            else:
+                exact = list(map(solve_exact, *args))
+            for b, (height, exact_placements) in zip(indices, exact):
+                if height < heights[b]:
+                    heights[b] = height
+                    placements[b] = exact_placements
+        return {
+            'heights': heights,
+            'placements': placements,
+            'orders': orders,
+            'lower_bounds': lower_bounds,
+            'gaps': gaps,
+            'fallback': fallback,
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Schedule a random batch with the inference path and time it.')
+    parser.add_argument('--batch', type=int, default=10000, help='instances in the batch')
+    parser.add_argument('--num', type=int, default=20, help='jobs per instance')
+    parser.add_argument('-W', type=int, default=16, help='amount of resource')
+    parser.add_argument('--res', type=int, nargs=2, default=(1, 8), metavar=('LOW', 'HIGH'))
+    parser.add_argument('--time', type=int, nargs=2, default=(1, 10), metavar=('LOW', 'HIGH'))
+    parser.add_argument('--max-gap', type=float, default=0.1, help='fall back to the exact search above this gap')
+    parser.add_argument('--time-limit', type=float, default=0.05, help='seconds per exact search')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='processes of the exact searches')
+    parser.add_argument('--model', help='weights saved by LinearOrderModel.save(), default: volume_sort order')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model = LinearOrderModel.load(args.model) if args.model else None
+    batch = gen_batch(args.batch, args.num, args.res[0], args.res[1], args.time[0], args.time[1], seed=args.seed)
+    scheduler = InferenceScheduler(args.W, model, max_gap=None, workers=args.workers)
+    start_time = time.perf_counter()
+    result = scheduler.schedule(batch)
+    elapsed = time.perf_counter() - start_time
+    print('placer: %d instances in %.3fs, %.4f ms each, mean gap %.4f, %d above %.2f' % (
+        args.batch, elapsed, 1000 * elapsed / args.batch, result['gaps'].mean(),
+        (result['gaps'] > args.max_gap).sum(), args.max_gap))
+    scheduler.max_gap = args.max_gap
+    scheduler.time_limit = args.time_limit
+    start_time = time.perf_counter()
+    result = scheduler.schedule(batch)
+    elapsed = time.perf_counter() - start_time
+    print('with fallback: %.3fs, %d exact searches, mean height %.3f' % (
+        elapsed, result['fallback'].sum(), result['heights'].mean()))
@@ -0,0 +1,229 @@
+"""
+Search statistics and profiling for CompactSolution.
+
+InstrumentedSolution is a drop-in CompactSolution that records, per run_model:
+- nodes and prunes (by reason) at every depth of the tree,
+- for every lower bound, how often it was evaluated and how often it pruned,
+- the timeline of incumbent improvements (elapsed seconds, height, nodes expanded so far),
+- with timers=True, calls and seconds spent computing corner points, placing and undoing jobs on the
+  envelope, and evaluating each bound.
+stats() returns all of it as plain dicts and lists, save_stats() writes it as JSON. profile_model()
+runs the search under cProfile and can dump a .prof file for pstats, snakeviz, gprof2dot or flameprof.
+
+The counters hook into the methods pack_jobs already calls, so CompactSolution itself is untouched and
+runs at full speed when no statistics are wanted.
+"""
+import cProfile
+import json
+import pstats
+import time
+
+from .compact_solution import CompactSolution
+from .skyline import Envelope
+
+
+class DepthPruneCounts(dict):
+    """
+    prune_counts of CompactSolution that also adds every prune to the depth being expanded.
+    """
+
+    def __init__(self, solution, counts):
+        super().__init__(counts)
+        self.solution = solution
+
+    def __setitem__(self, reason, count):
+        added = count - self.get(reason, 0)
+        if added:
+            depth = self.solution.depth_prunes[self.solution.depth]
+            depth[reason] = depth.get(reason, 0) + added
+        super().__setitem__(reason, count)
+
+
+class TimedEnvelope(Envelope):
+    """
+    Envelope that counts the calls and the time of corners(), place() and undo().
+    """
+
+    __slots__ = ('calls', 'seconds')
+
+    def __init__(self, W):
+        super().__init__(W)
+        self.calls = dict.fromkeys(('corners', 'place', 'undo'), 0)
+        self.seconds = dict.fromkeys(('corners', 'place', 'undo'), 0.0)
+
+    def place(self, x, y, width, height):
+        start_time = time.perf_counter()
+        super().place(x, y, width, height)
+        self.seconds['place'] += time.perf_counter() - start_time
+        self.calls['place'] += 1
+
+    def undo(self):
+        start_time = time.perf_counter()
+        super().undo()
+        self.seconds['undo'] += time.perf_counter() - start_time
+        self.calls['undo'] += 1
+
+    def corners(self, limit=None):
+        start_time = time.perf_counter()
+        corners = super().corners(limit)
+        self.seconds['corners'] += time.perf_counter() - start_time
+        self.calls['corners'] += 1
+        return corners
+
+
+class TimedBound:
+    """
+    Wraps a lower bound of lower_bounds.py and counts the calls and the time of node().
+    """
+
+    def __init__(self, bound):
+        self.bound = bound
+        self.name = bound.name
+        self.calls = 0
+        self.seconds = 0.0
+
+    def prepare(self, solution):
+        return self.bound.prepare(solution)
+
+    def node(self, solution, i):
+        start_time = time.perf_counter()
+        value = self.bound.node(solution, i)
+        self.seconds += time.perf_counter() - start_time
+        self.calls += 1
+        return value
+
+
+class InstrumentedSolution(CompactSolution):
+    """
+    CompactSolution that collects search statistics, see the module docstring. Only the serial search
+    is instrumented.
+    """
+
+    def __init__(self, W, timers=False):
+        """
+        :param W: Specify the maximum amount of resource
+        :param timers: also time the envelope operations and the lower bounds, which slows the search down
+        """
+        super().__init__(W)
+        self.timers = timers
+        # depth of the node being expanded
+        self.depth = 0
+        self.depth_nodes = []
+        self.depth_prunes = []
+        # (elapsed seconds, height, nodes expanded) at every improvement of the incumbent
+        self.timeline = []
+
+    def load_arrays(self):
+        super().load_arrays()
+        if self.timers:
+            self.envelope = TimedEnvelope(self.W)
+
+    def prepare_search(self, bounds=('area',), memo_size=0, symmetry=False):
+        super().prepare_search(bounds, memo_size, symmetry)
+        if self.timers:
+            self.bounds = [TimedBound(bound) for bound in self.bounds]
+        self.depth = 0
+        self.depth_nodes = [0] * (self.n + 1)
+        self.depth_prunes = [{} for i in range(self.n + 1)]
+        self.prune_counts = DepthPruneCounts(self, self.prune_counts)
+        self.timeline = []
+
+    def run_model(self, workers=1, **options):
+        """
+        Same as CompactSolution.run_model(), serial only.
+        """
+        if workers > 1:
+            raise ValueError('InstrumentedSolution only instruments the serial search, use workers=1')
+        super().run_model(**options)
+
+    def pack_jobs(self, i, overall_height):
+        self.depth = i
+        self.depth_nodes[i] += 1
+        super().pack_jobs(i, overall_height)
+
+    def improved(self):
+        self.timeline.append((time.monotonic() - self.start_time, self.optimal_height, self.nodes))
+        super().improved()
+
+    def bound_stats(self):
+        """
+        Bounds are tried in order at every node below the root that survives the height test, and stop at
+        the first one that prunes, so a bound is evaluated at the nodes no earlier test pruned.
+        :return: list of dicts with the name, evaluations, prunes and prune rate of every bound, plus its
+        calls and seconds with timers
+        """
+        evaluated = sum(self.depth_nodes[1:]) - self.prune_counts.get('height', 0)
+        stats = []
+        for bound in self.bounds:
+            pruned = self.prune_counts.get(bound.name, 0)
+            row = {
+                'name': bound.name,
+                'evaluated': evaluated,
+                'pruned': pruned,
+                'prune_rate': pruned / evaluated if evaluated else 0,
+            }
+            if self.timers:
+                row['calls'] = bound.calls
+                row['seconds'] = bound.seconds
+            stats.append(row)
+            evaluated -= pruned
+        return stats
+
+    def stats(self):
+        """
+        :return: dict of the statistics of the last run_model, made of plain types only
+        """
+        stats = {
+            'W': self.W,
+            'n': self.n,
+            'height': self.optimal_height,
+            'lower_bound': self.proven_lower_bound,
+            'stopped': self.stopped,
+            'elapsed_time': self.elapsed_time,
+            'nodes': self.nodes,
+            'prune_counts': dict(self.prune_counts),
+            'depths': [
+                {'depth': i, 'nodes': nodes, 'pruned': dict(prunes)}
+                for i, (nodes, prunes) in enumerate(zip(self.depth_nodes, self.depth_prunes))],
+            'bounds': self.bound_stats(),
+            'timeline': [
+                {'elapsed': elapsed, 'height': height, 'nodes': nodes}
+                for elapsed, height, nodes in self.timeline],
+        }
+        if self.table is not None:
+            stats['memo'] = self.table.stats()
+        if self.timers:
+            stats['envelope'] = {
+                name: {'calls': self.envelope.calls[name], 'seconds': self.envelope.seconds[name]}
+                for name in self.envelope.calls}
+        return stats
+
+    def save_stats(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.stats(), f, indent=1)
+
+    def profile_model(self, path=None, **options):
+        """
+        Run run_model under cProfile.
+        :param path: file to dump the profile to, for pstats, snakeviz, gprof2dot or flameprof
+        :param options: keyword arguments of run_model()
+        :return: pstats.Stats of the run
+        """
+        profile = cProfile.Profile()
+        profile.runcall(self.run_model, **options)
+        if path is not None:
+            profile.dump_stats(path)
+        return pstats.Stats(profile)
+
+    def print_stats(self):
+        stats = self.stats()
+        print('\nnodes: %d, elapsed time: %.4fs' % (stats['nodes'], stats['elapsed_time']))
+        print('depth    nodes  pruned')
+        for row in stats['depths']:
+            print('%5d %8d  %s' % (row['depth'], row['nodes'],
+                                   ', '.join('%s %d' % item for item in sorted(row['pruned'].items()))))
+        for row in stats['bounds']:
+            print('bound %-10s evaluated %8d  pruned %8d  (%.1f%%)' % (
+                row['name'], row['evaluated'], row['pruned'], 100 * row['prune_rate']))
+        for row in stats['timeline']:
+            print('height %s after %.4fs, %d nodes' % (row['height'], row['elapsed'], row['nodes']))
@@ -0,0 +1,208 @@
+"""
+Lower bounds on the height of a strip packing, used by CompactSolution to prune the branch and bound tree.
+
+Every bound is a class with prepare(solution), called once per run_model, and node(solution, i), which
+returns a lower bound on the height of any packing below a node where jobs 0..i-1 are placed and jobs
+i..n-1 are left. The remaining jobs are always a suffix of jobs_sorted, so the bounds that only depend
+on the remaining set are computed for every suffix in prepare(), and a node only adds the lowest floor
+the remaining jobs can start from. Job sizes are integers, so fractional bounds are rounded up.
+Searches that choose the next job dynamically reorder jobs i..n-1 and then call refresh(solution, i)
+to bring the suffix data at i up to date.
+"""
+
+
+def ceil_div(a, b):
+    return -(-a // b)
+
+
+def tallest_bound(W, widths, heights):
+    """
+    :return: the height of the tallest job
+    """
+    return max(heights, default=0)
+
+
+def continuous_bound(W, widths, heights):
+    """
+    :return: total area divided by W, rounded up
+    """
+    return ceil_div(sum(w * h for w, h in zip(widths, heights)), W)
+
+
+def martello_monaci_vigo_bound(W, widths, heights):
+    """
+    L1 bound of Martello, Monaci and Vigo (2003). For a threshold alpha <= W/2, jobs wider than W/2
+    can't run side by side and are stacked, jobs narrower than alpha are dropped, and the jobs in
+    between must fit next to the wide ones or above them, counted both by area and by how many of them
+    fit across a row.
+    :return: the best bound over alpha in the distinct widths up to W/2
+    """
+    wide = sum(h for w, h in zip(widths, heights) if 2 * w > W)
+    bound = wide
+    for alpha in set(w for w in widths if 2 * w <= W):
+        stacked = 0
+        beside_area = 0
+        beside_count = 0
+        small_area = 0
+        small_count = 0
+        for w, h in zip(widths, heights):
+            if w > W - alpha:
+                stacked += h
+            elif 2 * w > W:
+                stacked += h
+                beside_area += (W - w) * h
+                beside_count += (W - w) // alpha * h
+            elif w >= alpha:
+                small_area += w * h
+                small_count += h
+        by_area = max(0, ceil_div(small_area - beside_area, W))
+        by_count = max(0, ceil_div(small_count - beside_count, W // alpha))
+        bound = max(bound, stacked + by_area, stacked + by_count)
+    return bound
+
+
+def dual_feasible_bound(W, widths, heights, max_k=4):
+    """
+    Dual feasible function bound of Fekete and Schepers. Any row of the packing holds jobs whose widths
+    sum to at most W, so after mapping widths through a dual feasible function u they sum to at most
+    u(W), and the height is at least sum(h * u(w)) / u(W). Uses the u^(k) functions for k <= max_k,
+    each composed with the U^lambda functions for lambda in the distinct widths up to W/2.
+    :return: the best of these bounds
+    """
+    lambdas = [0] + sorted(set(w for w in widths if 2 * w <= W))
+    bound = 0
+    for lam in lambdas:
+        # U^lambda: widths above W - lambda count as W, widths below lambda as 0
+        mapped = [W if w > W - lam else (w if w >= lam else 0) for w in widths]
+        for k in range(1, max_k + 1):
+            # u^(k) scaled by k * W to stay in integers
+            total = 0
+            for w, h in zip(mapped, heights):
+                if (k + 1) * w % W == 0:
+                    total += k * w * h
+                else:
+                    total += (k + 1) * w // W * W * h
+            bound = max(bound, ceil_div(total, k * W))
+    return bound
+
+
+class AreaBound:
+    """
+    The area early stop of height_area_early_stop.py: packed area under the envelope plus the area left.
+    """
+
+    name = 'area'
+
+    def prepare(self, solution):
+        return solution.suffix_area[0] / solution.W
+
+    def node(self, solution, i):
+        return (solution.envelope.area + solution.suffix_area[i]) / solution.W
+
+    def refresh(self, solution, i):
+        # suffix_area is kept up to date by the search
+        pass
+
+
+class ContinuousBound:
+    """
+    Same as AreaBound but rounded up to the next integer height.
+    """
+
+    name = 'continuous'
+
+    def prepare(self, solution):
+        return ceil_div(solution.suffix_area[0], solution.W)
+
+    def node(self, solution, i):
+        return ceil_div(solution.envelope.area + solution.suffix_area[i], solution.W)
+
+    def refresh(self, solution, i):
+        pass
+
+
+class TallestBound:
+    """
+    Each remaining job ends at least its height above the lowest corner it fits on. A job of width w
+    can't start right of W - w, and the envelope only gets higher, so that corner is at least as high
+    as the envelope at W - w.
+    """
+
+    name = 'tallest'
+
+    def prepare(self, solution):
+        # tallest job of each width, for every suffix of jobs_sorted
+        self.tallest = [[] for i in range(solution.n + 1)]
+        by_width = {}
+        for i in range(solution.n - 1, -1, -1):
+            w = solution.widths[i]
+            by_width[w] = max(by_width.get(w, 0), solution.heights[i])
+            self.tallest[i] = sorted(by_width.items())
+        return tallest_bound(solution.W, solution.widths, solution.heights)
+
+    def node(self, solution, i):
+        height_at = solution.envelope.height_at
+        W = solution.W
+        return max([height_at(W - w) + h for w, h in self.tallest[i]], default=0)
+
+    def refresh(self, solution, i):
+        by_width = {}
+        for w, h in zip(solution.widths[i:], solution.heights[i:]):
+            by_width[w] = max(by_width.get(w, 0), h)
+        self.tallest[i] = sorted(by_width.items())
+
+
+class SuffixBound:
+    """
+    Set bound of the remaining jobs, stacked on the floor they all have to start from: the envelope
+    height at W minus the narrowest remaining width.
+    """
+
+    name = None
+    set_bound = None
+
+    def prepare(self, solution):
+        W = solution.W
+        widths = solution.widths
+        heights = solution.heights
+        self.values = [type(self).set_bound(W, widths[i:], heights[i:]) for i in range(solution.n + 1)]
+        # set bounds of the remaining sets met by refresh(), by sorted (width, height) pairs
+        self.cache = {}
+        return self.values[0]
+
+    def node(self, solution, i):
+        return solution.envelope.height_at(solution.W - solution.suffix_min_width[i]) + self.values[i]
+
+    def refresh(self, solution, i):
+        key = tuple(sorted(zip(solution.widths[i:], solution.heights[i:])))
+        value = self.cache.get(key)
+        if value is None:
+            value = self.cache[key] = type(self).set_bound(solution.W, solution.widths[i:], solution.heights[i:])
+        self.values[i] = value
+
+
+class MartelloMonaciVigoBound(SuffixBound):
+    name = 'mmv'
+    set_bound = martello_monaci_vigo_bound
+
+
+class DualFeasibleBound(SuffixBound):
+    name = 'dff'
+    set_bound = dual_feasible_bound
+
+
+BOUNDS = {
+    bound.name: bound
+    for bound in (AreaBound, ContinuousBound, TallestBound, MartelloMonaciVigoBound, DualFeasibleBound)
+}
+
+
+def make_bounds(names):
+    """
+    :param names: bound names, see BOUNDS, in the order they are tried at every node
+    :return: list of bound objects
+    """
+    for name in names:
+        if name not in BOUNDS:
+            raise ValueError('Unknown lower bound %r, choose from %s' % (name, ', '.join(BOUNDS)))
+    return [BOUNDS[name]() for name in names]
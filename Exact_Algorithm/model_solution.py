@@ -0,0 +1,264 @@
+"""
+Exact backends built on off-the-shelf solvers, for instances too big for the corner point search and to
+check its optima.
+
+    cp_sat  OR-Tools CP-SAT, with one x and one y interval per job under a 2D no-overlap constraint
+    milp    PuLP with CBC, the classic model with four left/right/below/above binaries per pair of jobs
+
+Both solvers are optional: the module imports without them and run_model raises an ImportError naming
+the package to install when the selected engine is missing.
+"""
+import math
+import time
+
+from .compact_solution import CompactSolution
+from .heuristics import HEURISTICS
+
+ENGINES = ('search', 'cp_sat', 'milp')
+
+
+def import_engine(engine):
+    """
+    :param engine: 'cp_sat' or 'milp'
+    :return: the solver module
+    """
+    try:
+        if engine == 'cp_sat':
+            from ortools.sat.python import cp_model
+            return cp_model
+        import pulp
+        return pulp
+    except ImportError as error:
+        package = 'ortools' if engine == 'cp_sat' else 'pulp'
+        raise ImportError('The %s engine needs the %s package, pip install %s' % (engine, package, package)) \
+            from error
+
+
+def same_jobs(widths, heights):
+    """
+    :return: pairs (i, i + 1) of identical jobs, next to each other in jobs_sorted. Any packing can swap
+    identical jobs so that the first one starts no later than the second.
+    """
+    return [(i, i + 1) for i in range(len(widths) - 1)
+            if widths[i] == widths[i + 1] and heights[i] == heights[i + 1]]
+
+
+class ModelSolution(CompactSolution):
+    """
+    CompactSolution whose run_model can hand the same jobs to CP-SAT or to a MILP solver instead of the
+    corner point search. Both models place jobs anywhere on the integer grid, so their optimum is the
+    true optimum of the strip packing problem and can be lower than what the corner point search with
+    the fixed job order of jobs_sorted reaches. The best heuristic packing is the starting incumbent and
+    the horizon of the model, the lower bounds of prepare_search() bound its objective from below.
+    """
+
+    def __init__(self, W):
+        super().__init__(W)
+        self.engine = 'search'
+        # status name reported by the solver
+        self.status = None
+
+    def run_model(self, workers=1, bounds=('tallest', 'continuous', 'mmv'), warm_start=True, memo_size=0,
+                  symmetry=False, time_limit=None, node_limit=None, on_improve=None, *, engine='cp_sat'):
+        """
+        Same arguments as CompactSolution.run_model(), in the same order, plus the engine.
+        :param workers: threads of the solver
+        :param bounds: lower bounds added to the model, see lower_bounds.BOUNDS
+        :param warm_start: heuristics giving the first incumbent and the horizon of a model, True for all
+        of them. A model always needs one, so False also runs all of them.
+        :param memo_size: search engine only
+        :param symmetry: search engine only
+        :param time_limit: stop after this many seconds and keep the best packing found so far
+        :param node_limit: search engine only, the solvers count their work differently
+        :param on_improve: see CompactSolution.run_model(), only fired for the final packing of a model
+        :param engine: one of ENGINES, 'search' runs CompactSolution.run_model() with the other arguments
+        :return: None, same attributes as CompactSolution.run_model()
+        """
+        if engine not in ENGINES:
+            raise ValueError('Unknown engine %r, choose from %s' % (engine, ', '.join(ENGINES)))
+        self.engine = engine
+        if engine == 'search':
+            self.status = None
+            super().run_model(workers, bounds, warm_start, memo_size, symmetry, time_limit, node_limit, on_improve)
+            return
+        solver_module = import_engine(engine)
+        self.optimal_height = float('inf')
+        self.optimal_xs = []
+        self.optimal_ys = []
+        self.on_improve = on_improve
+        self.set_budget(time_limit)
+        self.load_arrays()
+        self.prepare_search(bounds)
+        if self.n == 0:
+            self.optimal_height = 0
+            self.status = 'OPTIMAL'
+            self.finish(0)
+            return
+        # the horizon has to hold a packing, the heuristics always find one
+        self.warm_start(warm_start if warm_start and warm_start is not True else list(HEURISTICS))
+        if self.optimal_height <= self.lower_bound:
+            self.status = 'OPTIMAL'
+            self.finish(self.optimal_height)
+            return
+        if engine == 'cp_sat':
+            frontier_bound = self.solve_cp_sat(solver_module, workers, time_limit)
+        else:
+            frontier_bound = self.solve_milp(solver_module, workers, time_limit)
+        self.finish(frontier_bound)
+
+    def remaining_time(self, time_limit):
+        if time_limit is None:
+            return None
+        return max(0.0, time_limit - (time.monotonic() - self.start_time))
+
+    def save_model_packing(self, height, xs, ys):
+        if height < self.optimal_height:
+            self.optimal_height = height
+            self.optimal_xs = xs
+            self.optimal_ys = ys
+            self.improved()
+
+    def solve_cp_sat(self, cp_model, workers, time_limit):
+        """
+        :return: lower bound proven by the solver
+        """
+        n, W, horizon = self.n, self.W, self.optimal_height
+        model = cp_model.CpModel()
+        xs = [model.NewIntVar(0, W - self.widths[i], 'x%d' % i) for i in range(n)]
+        ys = [model.NewIntVar(0, horizon - self.heights[i], 'y%d' % i) for i in range(n)]
+        x_intervals = [model.NewFixedSizeIntervalVar(xs[i], self.widths[i], 'xi%d' % i) for i in range(n)]
+        y_intervals = [model.NewFixedSizeIntervalVar(ys[i], self.heights[i], 'yi%d' % i) for i in range(n)]
+        model.AddNoOverlap2D(x_intervals, y_intervals)
+        # redundant, but it lets the solver reason on the resource profile over time
+        model.AddCumulative(y_intervals, self.widths, W)
+        for i, j in same_jobs(self.widths, self.heights):
+            model.Add(ys[i] <= ys[j])
+        height = model.NewIntVar(math.ceil(self.lower_bound), horizon, 'height')
+        for i in range(n):
+            model.Add(ys[i] + self.heights[i] <= height)
+        model.Minimize(height)
+        for i in range(n):
+            model.AddHint(xs[i], self.optimal_xs[i])
+            model.AddHint(ys[i], self.optimal_ys[i])
+        solver = cp_model.CpSolver()
+        solver.parameters.num_workers = workers
+        if time_limit is not None:
+            solver.parameters.max_time_in_seconds = self.remaining_time(time_limit)
+        status = solver.Solve(model)
+        self.status = solver.StatusName(status)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            self.save_model_packing(int(solver.Value(height)), [solver.Value(x) for x in xs],
+                                    [solver.Value(y) for y in ys])
+        if status == cp_model.OPTIMAL:
+            return self.optimal_height
+        self.stopped = True
+        if status == cp_model.FEASIBLE:
+            return math.ceil(solver.BestObjectiveBound())
+        return math.ceil(self.lower_bound)
+
+    def solve_milp(self, pulp, workers, time_limit):
+        """
+        :return: lower bound proven by the solver, the one of prepare_search() if it was stopped
+        """
+        n, W, horizon = self.n, self.W, self.optimal_height
+        problem = pulp.LpProblem('strip_packing', pulp.LpMinimize)
+        xs = [pulp.LpVariable('x%d' % i, 0, W - self.widths[i], cat='Integer') for i in range(n)]
+        ys = [pulp.LpVariable('y%d' % i, 0, horizon - self.heights[i], cat='Integer') for i in range(n)]
+        height = pulp.LpVariable('height', math.ceil(self.lower_bound), horizon)
+        problem += height
+        for i in range(n):
+            problem += ys[i] + self.heights[i] <= height
+        for i in range(n):
+            for j in range(i + 1, n):
+                # i left of j, j left of i, i below j, j below i
+                left, right, below, above = [pulp.LpVariable('%s_%d_%d' % (side, i, j), cat='Binary')
+                                             for side in ('l', 'r', 'b', 'a')]
+                problem += left + right + below + above >= 1
+                problem += xs[i] + self.widths[i] <= xs[j] + W * (1 - left)
+                problem += xs[j] + self.widths[j] <= xs[i] + W * (1 - right)
+                problem += ys[i] + self.heights[i] <= ys[j] + horizon * (1 - below)
+                problem += ys[j] + self.heights[j] <= ys[i] + horizon * (1 - above)
+                if self.widths[i] + self.widths[j] > W:
+                    # they can't be side by side
+                    problem += left + right == 0
+        for i, j in same_jobs(self.widths, self.heights):
+            problem += ys[i] <= ys[j]
+        for i in range(n):
+            xs[i].setInitialValue(self.optimal_xs[i])
+            ys[i].setInitialValue(self.optimal_ys[i])
+        height.setInitialValue(horizon)
+        solver = pulp.PULP_CBC_CMD(msg=False, threads=workers, warmStart=True,
+                                   timeLimit=self.remaining_time(time_limit))
+        problem.solve(solver)
+        self.status = pulp.LpStatus[problem.status]
+        if problem.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+            self.save_model_packing(int(round(height.varValue)), [int(round(x.varValue)) for x in xs],
+                                    [int(round(y.varValue)) for y in ys])
+        if problem.sol_status == pulp.LpSolutionOptimal:
+            return self.optimal_height
+        self.stopped = True
+        return math.ceil(self.lower_bound)
+
+
+def check_packing(W, jobs, height, placements):
+    """
+    :param W: Specify the maximum amount of resource
+    :param jobs: list of (width, height)
+    :param height: claimed height of the packing
+    :param placements: (x, y) in the order of jobs
+    :return: list of problems, empty if the packing is valid and exactly height high
+    """
+    problems = []
+    top = 0
+    for k, ((w, h), (x, y)) in enumerate(zip(jobs, placements)):
+        if x < 0 or y < 0 or x + w > W:
+            problems.append('job %d at (%d, %d) is outside the strip' % (k, x, y))
+        top = max(top, y + h)
+    for k in range(len(jobs)):
+        (wk, hk), (xk, yk) = jobs[k], placements[k]
+        for l in range(k + 1, len(jobs)):
+            (wl, hl), (xl, yl) = jobs[l], placements[l]
+            if xk < xl + wl and xl < xk + wk and yk < yl + hl and yl < yk + hk:
+                problems.append('jobs %d and %d overlap' % (k, l))
+    if top != height:
+        problems.append('packing is %d high, not %d' % (top, height))
+    return problems
+
+
+def cross_check(W, jobs, engine='cp_sat', time_limit=None, **options):
+    """
+    Solve the same jobs with the corner point search and with a model engine and compare them. The model
+    optimum is a true optimum, so the search may end higher (its fixed job order misses some packings)
+    but never lower.
+    :param W: Specify the maximum amount of resource
+    :param jobs: list of (width, height)
+    :param engine: 'cp_sat' or 'milp'
+    :param time_limit: seconds per engine, None for no limit
+    :param options: keyword arguments of CompactSolution.run_model() for the search
+    :return: dict with the 'search' and model heights, 'proven' if the model reached its optimum, the list
+    of 'problems' found (invalid packings, a search below a proven optimum) and 'ok' if there is none
+    """
+    heights = {}
+    problems = []
+    proven = False
+    for name in ('search', engine):
+        solution = ModelSolution(W)
+        solution.load_jobs([{'width': w, 'height': h} for w, h in jobs])
+        if name == 'search':
+            solution.run_model(time_limit=time_limit, engine='search', **options)
+        else:
+            solution.run_model(time_limit=time_limit, engine=engine)
+            proven = not solution.stopped
+        heights[name] = solution.optimal_height
+        if solution.optimal_height != float('inf'):
+            problems += ['%s: %s' % (name, problem)
+                         for problem in check_packing(W, jobs, solution.optimal_height, solution.placements())]
+    if proven and heights['search'] < heights[engine]:
+        problems.append('search found height %d below the proven optimum %d' % (heights['search'], heights[engine]))
+    return {
+        'search': heights['search'],
+        engine: heights[engine],
+        'proven': proven,
+        'problems': problems,
+        'ok': not problems,
+    }
@@ -0,0 +1,306 @@
+import random
+
+from .compact_solution import CompactSolution, SearchStopped
+from .lower_bounds import ceil_div, dual_feasible_bound, martello_monaci_vigo_bound
+
+
+class ResourceProfile:
+    """
+    Usage over time of the resources that are shared without a position, e.g. memory or GPU slots next to
+    the CPUs packed along the strip. Jobs are kept on a stack so the search can roll them back with undo().
+    """
+
+    __slots__ = ('capacities', 'starts', 'ends', 'demands')
+
+    def __init__(self, capacities):
+        """
+        :param capacities: amount of every shared resource
+        """
+        self.capacities = tuple(capacities)
+        self.starts = []
+        self.ends = []
+        self.demands = []
+
+    def place(self, y, height, demands):
+        self.starts.append(y)
+        self.ends.append(y + height)
+        self.demands.append(demands)
+
+    def undo(self):
+        self.starts.pop()
+        self.ends.pop()
+        self.demands.pop()
+
+    def fits(self, y, height, demands):
+        """
+        :return: True if a job running from y to y + height with these demands stays within every capacity
+        """
+        end = y + height
+        # usage only goes up where a job starts
+        for t in [y] + [start for start in self.starts if y < start < end]:
+            for k, capacity in enumerate(self.capacities):
+                used = demands[k]
+                for start, stop, other in zip(self.starts, self.ends, self.demands):
+                    if start <= t < stop:
+                        used += other[k]
+                if used > capacity:
+                    return False
+        return True
+
+    def earliest(self, y, height, demands):
+        """
+        :return: the first start from y on where the job fits, y itself or the end of a job
+        """
+        if not self.capacities or self.fits(y, height, demands):
+            return y
+        for t in sorted(set(end for end in self.ends if end > y)):
+            if self.fits(t, height, demands):
+                return t
+        # after the last end the job runs alone
+        raise ValueError('Demands %r exceed the capacities %r' % (tuple(demands), self.capacities))
+
+    def volume_above(self, floor, k):
+        """
+        :return: resource k times time used by the jobs after floor
+        """
+        return sum(demands[k] * (stop - max(start, floor))
+                   for start, stop, demands in zip(self.starts, self.ends, self.demands) if stop > floor)
+
+
+class ResourceBound:
+    """
+    Lower bounds of every shared resource. The remaining jobs start above the envelope floor at W minus the
+    narrowest remaining width, see lower_bounds.SuffixBound, and from there:
+    - their volume plus the volume of the placed jobs above the floor has to fit below the height, the
+      area bound of the strip;
+    - they need at least the Martello, Monaci and Vigo or the dual feasible function bound of their
+      demands. Both only reason on what runs at the same moment, so they hold for resources without a
+      position too.
+    """
+
+    name = 'resource'
+
+    def prepare(self, solution):
+        # values[k][i]: set bound of the demands on resource k + 1 of jobs i..n-1
+        self.values = []
+        for k, capacity in enumerate(solution.capacities[1:]):
+            values = []
+            for i in range(solution.n + 1):
+                # jobs without any of the resource don't compete for it
+                used = [(job_demands[k], h) for job_demands, h in zip(solution.demands[i:], solution.heights[i:])
+                        if job_demands[k]]
+                widths = [w for w, h in used]
+                heights = [h for w, h in used]
+                values.append(max(martello_monaci_vigo_bound(capacity, widths, heights),
+                                  dual_feasible_bound(capacity, widths, heights)))
+            self.values.append(values)
+        return max([max(ceil_div(volumes[0], capacity), values[0]) for volumes, values, capacity
+                    in zip(solution.suffix_volumes, self.values, solution.capacities[1:])], default=0)
+
+    def node(self, solution, i):
+        floor = solution.envelope.height_at(solution.W - solution.suffix_min_width[i])
+        profile = solution.profile
+        bound = 0
+        for k, capacity in enumerate(profile.capacities):
+            bound = max(bound, floor + self.values[k][i],
+                        floor + ceil_div(solution.suffix_volumes[k][i] + profile.volume_above(floor, k), capacity))
+        return bound
+
+
+class MultiResourceSolution(CompactSolution):
+    """
+    CompactSolution for jobs that need several resources at once. Every job has a vector of resources,
+    one per capacity in capacities. The first resource is packed along the strip exactly like W and
+    width; the others are only bounded in total at every moment, like memory or GPU slots that don't
+    need to be contiguous. A job is tried on every corner point of the envelope of the first resource
+    and, if another resource is short there, slides up to the first end of a job where everything fits.
+    With a single capacity this is the search of CompactSolution.
+
+    Every search also prunes with ResourceBound, so each shared resource gets the same area and set
+    bounds as the strip. The memo, symmetry breaking and parallel search compare envelopes only, which
+    is not enough with shared resources, so they are not available.
+    """
+
+    def __init__(self, capacities):
+        """
+        :param capacities: amount of every resource, capacities[0] plays the role of W
+        """
+        super().__init__(capacities[0])
+        self.capacities = tuple(capacities)
+        # shared resources of every job in jobs_sorted order, see load_arrays()
+        self.demands = []
+        # suffix_volumes[k][i] is resource k + 1 times time of jobs i..n-1
+        self.suffix_volumes = []
+        self.profile = ResourceProfile(self.capacities[1:])
+
+    def gen_uniform_jobs(self, num, res_low, res_high, time_low, time_high, seed=None):
+        """
+        Generate uniform jobs, and save them into self.jobs
+        :param num: The number of jobs waited to schedule.
+        :param res_low: The smallest amount of every resource that a job may request, a number or one per
+        resource.
+        :param res_high: The biggest amount of every resource that a job may request, same as res_low. Both are
+        capped by the capacity of the resource.
+        :param time_low: The smallest amount of time that a job may request.
+        :param time_high: The biggest amount of time that a job may request.
+        :param seed: seed of a private random generator, None uses the global one.
+        :return: None
+        """
+        rng = random if seed is None else random.Random(seed)
+        d = len(self.capacities)
+        lows = res_low if isinstance(res_low, (list, tuple)) else [res_low] * d
+        highs = res_high if isinstance(res_high, (list, tuple)) else [res_high] * d
+        self.jobs = []
+        for i in range(num):
+            resources = tuple(rng.randrange(min(low, capacity), min(high, capacity) + 1)
+                              for low, high, capacity in zip(lows, highs, self.capacities))
+            self.jobs.append({'x': 0, 'y': 0, 'width': resources[0], 'height': rng.randrange(time_low, time_high),
+                              'resources': resources})
+        self.volume_sort()
+
+    def load_jobs(self, jobs):
+        """
+        Use an existing list of jobs instead of generating them.
+        :param jobs: list of dicts with 'resources', one amount per capacity, and 'height'
+        :return: None
+        """
+        self.jobs = []
+        for job in jobs:
+            resources = tuple(job['resources'])
+            if len(resources) != len(self.capacities):
+                raise ValueError('Job needs %d resources, there are %d capacities'
+                                 % (len(resources), len(self.capacities)))
+            if any(amount > capacity for amount, capacity in zip(resources, self.capacities)):
+                raise ValueError('Job %r needs more than the capacities %r' % (resources, self.capacities))
+            self.jobs.append({'x': 0, 'y': 0, 'width': resources[0], 'height': job['height'],
+                              'resources': resources})
+        self.volume_sort()
+
+    def volume_sort(self):
+        """
+        Sort jobs according to non-increasing heights then volumes relative to the capacities, which is the
+        order of CompactSolution for a single resource. Identical jobs end up next to each other.
+        :return: None
+        """
+        self.jobs_sorted = sorted(
+            self.jobs,
+            key=lambda job: (job['height'],
+                             sum(amount / capacity for amount, capacity in zip(job['resources'], self.capacities)) *
+                             job['height'],
+                             job['resources']),
+            reverse=True)
+
+    def load_arrays(self):
+        super().load_arrays()
+        n = self.n
+        self.demands = [job['resources'][1:] for job in self.jobs_sorted]
+        self.suffix_volumes = []
+        for k in range(len(self.capacities) - 1):
+            volumes = [0] * (n + 1)
+            for i in range(n - 1, -1, -1):
+                volumes[i] = volumes[i + 1] + self.demands[i][k] * self.heights[i]
+            self.suffix_volumes.append(volumes)
+        self.profile = ResourceProfile(self.capacities[1:])
+
+    def prepare_search(self, bounds=('area',), memo_size=0, symmetry=False):
+        if memo_size or symmetry:
+            raise ValueError('The memo and symmetry breaking only compare envelopes, they are not available with '
+                             'several resources')
+        super().prepare_search(bounds)
+        if len(self.capacities) > 1:
+            bound = ResourceBound()
+            self.bounds.append(bound)
+            self.prune_counts[bound.name] = 0
+            self.lower_bound = max(self.lower_bound, bound.prepare(self))
+
+    def run_model(self, workers=1, **options):
+        """
+        Same as CompactSolution.run_model(), serial only.
+        """
+        if workers > 1:
+            raise ValueError('MultiResourceSolution only runs the serial search, use workers=1')
+        super().run_model(**options)
+
+    def warm_start(self, names):
+        """
+        The heuristics of heuristics.py only know the strip, so every name runs the same greedy dive: each
+        job in jobs_sorted order on the corner point where it ends lowest, leftmost on ties.
+        :param names: ignored, see above
+        :return: None
+        """
+        envelope = self.envelope
+        profile = self.profile
+        for i in range(self.n):
+            width, height, demands = self.widths[i], self.heights[i], self.demands[i]
+            best = None
+            for x, y in envelope.corners(self.W - width):
+                y = profile.earliest(y, height, demands)
+                if best is None or (y + height, x) < (best[1] + height, best[0]):
+                    best = (x, y)
+            self.xs[i], self.ys[i] = best
+            envelope.place(best[0], best[1], width, height)
+            profile.place(best[1], height, demands)
+        height = envelope.height
+        for i in range(self.n):
+            envelope.undo()
+            profile.undo()
+        self.heuristic_results = {'greedy': (height, list(zip(self.xs, self.ys)), 0)}
+        if height < self.optimal_height:
+            self.update_optimal(height)
+
+    def pack_jobs(self, i, overall_height):
+        """
+        Place job i at every feasible corner point, moved up until the shared resources fit, then recurse on
+        job i + 1. Same pruning as CompactSolution.pack_jobs().
+        :param i: index of the next job in jobs_sorted
+        :param overall_height: the highest end-point of jobs 0..i-1
+        :return: None
+        """
+        envelope = self.envelope
+        profile = self.profile
+        self.nodes += 1
+        if self.nodes >= self.next_check and self.out_of_budget():
+            raise SearchStopped(self.node_bound(i, overall_height))
+        if i != 0:
+            if overall_height >= self.optimal_height:
+                self.prune_counts['height'] += 1
+                return
+            for bound in self.bounds:
+                if bound.node(self, i) >= self.optimal_height:
+                    self.prune_counts[bound.name] += 1
+                    return
+            if i == self.n:
+                self.update_optimal(overall_height)
+                return
+
+        corners = envelope.corners(self.W - self.suffix_min_width[i])
+        width = self.widths[i]
+        height = self.heights[i]
+        demands = self.demands[i]
+        limit = self.W - width
+        k = 0
+        try:
+            for k, (x, y) in enumerate(corners):
+                if x <= limit:
+                    y = profile.earliest(y, height, demands)
+                    top = y + height
+                    self.xs[i] = x
+                    self.ys[i] = y
+                    envelope.place(x, y, width, height)
+                    profile.place(y, height, demands)
+                    self.pack_jobs(i + 1, top if top > overall_height else overall_height)
+                    profile.undo()
+                    envelope.undo()
+                    if self.optimal_height <= self.lower_bound:
+                        return
+        except SearchStopped as stop:
+            profile.undo()
+            envelope.undo()
+            if any(x <= limit for x, y in corners[k + 1:]):
+                stop.frontier_bound = min(stop.frontier_bound, self.node_bound(i, overall_height))
+            raise
+
+    def finish(self, frontier_bound):
+        super().finish(frontier_bound)
+        for job, resources in zip(self.optimal_jobs, (job['resources'] for job in self.jobs_sorted)):
+            job['resources'] = resources
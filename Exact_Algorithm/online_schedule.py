@@ -0,0 +1,237 @@
+from .compact_solution import CompactSolution, SearchStopped
+from .skyline import Envelope
+
+
+def fits(placed, x, y, width, height):
+    """
+    :param placed: list of dicts with 'x', 'y', 'width' and 'height'
+    :return: True if a job at (x, y) overlaps none of the placed jobs
+    """
+    for job in placed:
+        if x < job['x'] + job['width'] and job['x'] < x + width and \
+                y < job['y'] + job['height'] and job['y'] < y + height:
+            return False
+    return True
+
+
+def free_position(W, placed, width, height, floor):
+    """
+    Bottom-left position of a new job among jobs that stay where they are, holes included.
+    :param W: Specify the maximum amount of resource
+    :param placed: list of dicts with 'x', 'y', 'width' and 'height'
+    :param width: width of the new job
+    :param height: height of the new job
+    :param floor: the job can't start earlier than this
+    :return: (x, y), lowest then leftmost
+    """
+    xs = sorted(set([0] + [job['x'] + job['width'] for job in placed if job['x'] + job['width'] + width <= W]))
+    ys = sorted(set([floor] + [job['y'] + job['height'] for job in placed if job['y'] + job['height'] > floor]))
+    for y in ys:
+        for x in xs:
+            if fits(placed, x, y, width, height):
+                return x, y
+    # unreachable: the top of the highest job is free everywhere
+    return 0, ys[-1]
+
+
+class RepairSolution(CompactSolution):
+    """
+    CompactSolution that packs the jobs that haven't started yet on top of the envelope of the ones that
+    have, starting from the current plan as incumbent so only better plans are searched.
+    """
+
+    def repair(self, floor_jobs, incumbent, bounds=('area',), time_limit=None, node_limit=None):
+        """
+        :param floor_jobs: placed jobs that can't move, as dicts with 'x', 'y', 'width' and 'height'
+        :param incumbent: (height, placements) of the current plan, placements in the order of self.jobs
+        :param bounds: see run_model()
+        :param time_limit: see run_model()
+        :param node_limit: see run_model()
+        :return: True if a lower plan was found, see placements()
+        """
+        self.set_budget(time_limit, node_limit)
+        self.load_arrays()
+        # the corner points only follow the staircase of the fixed jobs, holes below it are not used
+        self.envelope = Envelope.from_jobs(self.W, floor_jobs)
+        self.prepare_search(bounds)
+        height, placements = incumbent
+        position = {id(job): k for k, job in enumerate(self.jobs)}
+        self.optimal_height = height
+        self.optimal_xs = [placements[position[id(job)]][0] for job in self.jobs_sorted]
+        self.optimal_ys = [placements[position[id(job)]][1] for job in self.jobs_sorted]
+        try:
+            self.pack_jobs(0, self.envelope.height)
+            frontier_bound = self.optimal_height
+        except SearchStopped as stop:
+            self.stopped = True
+            frontier_bound = stop.frontier_bound
+        self.finish(frontier_bound)
+        return self.optimal_height < height
+
+
+class OnlineSchedule:
+    """
+    Schedule that is kept up to date while time passes, jobs arrive and jobs finish, instead of solving
+    every new set of jobs from scratch.
+
+    Jobs that started before the current time (y < now) stay where they are. A new job is first put in
+    the lowest free spot of the current plan, holes included, which leaves every other job in place. Only
+    if that makes the schedule longer, the jobs that haven't started are packed again by a RepairSolution
+    on top of the fixed ones, with the current plan as incumbent and a node budget, so the search only
+    looks for strictly better plans and stops early. When a job finishes early, the jobs that haven't
+    started are moved down into the freed space, one by one.
+    """
+
+    def __init__(self, W, bounds=('tallest', 'continuous', 'mmv'), node_limit=20000, time_limit=None):
+        """
+        :param W: Specify the maximum amount of resource
+        :param bounds: lower bounds of the initial solve and of the repairs, see lower_bounds.BOUNDS
+        :param node_limit: nodes a repair may expand, None for no limit
+        :param time_limit: seconds a repair may take, None for no limit
+        """
+        self.W = W
+        self.bounds = bounds
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.now = 0
+        # id -> job dict with 'x', 'y', 'width' and 'height', for jobs that haven't finished
+        self.jobs = {}
+        self.finished = {}
+        self.next_id = 0
+        self.repairs = 0
+        self.improved_repairs = 0
+        self.repair_nodes = 0
+
+    @property
+    def makespan(self):
+        """
+        :return: the time every known job is finished by
+        """
+        return max([job['y'] + job['height'] for job in self.jobs.values()] + [self.now])
+
+    def started(self, job):
+        return job['y'] < self.now
+
+    def new_id(self, job_id):
+        if job_id is None:
+            job_id = self.next_id
+        if job_id in self.jobs or job_id in self.finished:
+            raise ValueError('Job id %r is already used' % (job_id,))
+        if isinstance(job_id, int):
+            self.next_id = max(self.next_id, job_id + 1)
+        return job_id
+
+    def start(self, jobs):
+        """
+        Solve a set of jobs with the exact search, from the current time on, without the node budget of
+        the repairs.
+        :param jobs: list of (width, height)
+        :return: ids of the jobs
+        """
+        ids = []
+        for width, height in jobs:
+            ids.append(self.add_job(width, height, repair=False))
+        # the jobs one by one in their lowest free spot are the incumbent of a full search
+        self.repair(node_limit=None)
+        return ids
+
+    def add_job(self, width, height, job_id=None, repair=True):
+        """
+        :param width: amount of resource of the new job
+        :param height: amount of time of the new job
+        :param job_id: identifier, None for the next free integer
+        :param repair: pack the jobs that haven't started again if the new job makes the schedule longer
+        :return: id of the job
+        """
+        if not 1 <= width <= self.W or height < 1:
+            raise ValueError('Job (%r, %r) does not fit, widths must be in [1, W] and heights positive'
+                             % (width, height))
+        job_id = self.new_id(job_id)
+        makespan = self.makespan
+        x, y = free_position(self.W, list(self.jobs.values()), width, height, self.now)
+        self.jobs[job_id] = {'x': x, 'y': y, 'width': width, 'height': height}
+        if repair and y + height > makespan:
+            self.repair()
+        return job_id
+
+    def complete_job(self, job_id, at=None):
+        """
+        Mark a job as finished, possibly earlier than planned.
+        :param job_id: id of a started job
+        :param at: time it finished, the current time by default
+        :return: None
+        """
+        at = self.now if at is None else at
+        job = self.jobs[job_id]
+        if job['y'] > at:
+            raise ValueError('Job %r starts at %r, it can not finish at %r' % (job_id, job['y'], at))
+        job['height'] = min(job['height'], at - job['y'])
+        self.finished[job_id] = self.jobs.pop(job_id)
+        self.settle()
+
+    def advance(self, now):
+        """
+        Move the current time forward. Jobs planned before it have started, jobs ending before it are
+        finished.
+        :param now: new current time
+        :return: ids of the jobs that finished
+        """
+        if now < self.now:
+            raise ValueError('Time can not go back from %r to %r' % (self.now, now))
+        self.now = now
+        done = [job_id for job_id, job in self.jobs.items() if job['y'] + job['height'] <= now]
+        for job_id in done:
+            self.finished[job_id] = self.jobs.pop(job_id)
+        return done
+
+    def settle(self):
+        """
+        Move every job that hasn't started to its lowest free spot, earliest jobs first. A job never ends
+        up later than it was, so the schedule doesn't get longer.
+        :return: None
+        """
+        planned = sorted((job for job in self.jobs.values() if not self.started(job)),
+                         key=lambda job: (job['y'], job['x']))
+        for job in planned:
+            others = [other for other in self.jobs.values() if other is not job]
+            x, y = free_position(self.W, others, job['width'], job['height'], self.now)
+            if (y, x) < (job['y'], job['x']):
+                job['x'], job['y'] = x, y
+
+    def repair(self, node_limit=0):
+        """
+        Pack the jobs that haven't started again on top of the ones that have, keeping the current plan
+        unless a lower one is found within the budget.
+        :param node_limit: nodes the search may expand, 0 for self.node_limit, None for no limit
+        :return: True if the plan changed
+        """
+        planned_ids = [job_id for job_id, job in self.jobs.items() if not self.started(job)]
+        if not planned_ids:
+            return False
+        fixed = [job for job in self.jobs.values() if self.started(job)]
+        # nothing can start before now
+        floor_jobs = fixed + [{'x': 0, 'y': 0, 'width': self.W, 'height': self.now}]
+        solution = RepairSolution(self.W)
+        solution.jobs = [dict(self.jobs[job_id]) for job_id in planned_ids]
+        solution.volume_sort()
+        incumbent = (self.makespan, [(job['x'], job['y']) for job in solution.jobs])
+        improved = solution.repair(floor_jobs, incumbent, self.bounds, self.time_limit,
+                                   self.node_limit if node_limit == 0 else node_limit)
+        self.repairs += 1
+        self.repair_nodes += solution.nodes
+        if not improved:
+            return False
+        self.improved_repairs += 1
+        for job_id, (x, y) in zip(planned_ids, solution.placements()):
+            self.jobs[job_id]['x'] = x
+            self.jobs[job_id]['y'] = y
+        return True
+
+    def schedule(self):
+        """
+        :return: list of dicts with 'id', 'x', 'y', 'width', 'height' and 'started' of the jobs that haven't
+        finished, by start time
+        """
+        return sorted(
+            ({'id': job_id, 'started': self.started(job), **job} for job_id, job in self.jobs.items()),
+            key=lambda job: (job['y'], job['x']))
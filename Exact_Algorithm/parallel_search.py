@@ -0,0 +1,132 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .compact_solution import CompactSolution, SearchStopped
+
+# shared incumbent of the worker processes, set by init_worker()
+shared_height = None
+shared_lock = None
+
+# how many nodes a worker expands between two reads of the shared incumbent
+SYNC_INTERVAL = 256
+
+
+class WorkerSolution(CompactSolution):
+    """
+    CompactSolution that runs inside a pool process, pulls the best height found by any worker every
+    SYNC_INTERVAL nodes and publishes its own improvements, so every worker prunes against the global
+    incumbent.
+    """
+
+    def __init__(self, W):
+        super().__init__(W)
+        self.ticks = 0
+        # best height found by this worker itself, optimal_height may come from another one
+        self.found_height = None
+
+    def pack_jobs(self, i, overall_height):
+        self.ticks += 1
+        if self.ticks % SYNC_INTERVAL == 0 and shared_height.value < self.optimal_height:
+            self.optimal_height = shared_height.value
+        super().pack_jobs(i, overall_height)
+
+    def update_optimal(self, overall_height):
+        super().update_optimal(overall_height)
+        self.found_height = overall_height
+        with shared_lock:
+            if overall_height < shared_height.value:
+                shared_height.value = overall_height
+
+
+def init_worker(height, lock):
+    global shared_height, shared_lock
+    shared_height = height
+    shared_lock = lock
+
+
+def solve_subproblem(W, widths, heights, prefix, options, deadline=None, node_limit=None):
+    """
+    Search the subtree below one prefix of placements.
+    :param W: Specify the maximum amount of resource
+    :param widths: widths in jobs_sorted order
+    :param heights: heights in jobs_sorted order
+    :param prefix: placements of the first jobs, see CompactSolution.place_prefix()
+    :param options: keyword arguments of CompactSolution.prepare_search()
+    :param deadline: time.monotonic() at which to stop, None for no limit
+    :param node_limit: nodes this subproblem may expand, None for no limit
+    :return: (height, xs, ys, nodes, prune_counts, frontier_bound), height is None if the subtree could
+    not beat the incumbent, frontier_bound is None if the subtree was searched completely
+    """
+    solution = WorkerSolution(W)
+    solution.jobs_sorted = [{'x': 0, 'y': 0, 'width': w, 'height': h} for w, h in zip(widths, heights)]
+    solution.jobs = solution.jobs_sorted
+    solution.load_arrays()
+    solution.prepare_search(**options)
+    solution.set_budget(deadline - time.monotonic() if deadline is not None else None, node_limit)
+    overall_height = solution.place_prefix(prefix)
+    solution.optimal_height = shared_height.value
+    frontier_bound = None
+    try:
+        solution.pack_jobs(len(prefix), overall_height)
+    except SearchStopped as stop:
+        frontier_bound = stop.frontier_bound
+    if solution.found_height is None:
+        return None, None, None, solution.nodes, solution.prune_counts, frontier_bound
+    return (solution.found_height, solution.optimal_xs, solution.optimal_ys, solution.nodes,
+            solution.prune_counts, frontier_bound)
+
+
+def split_depth(solution, workers, tasks_per_worker=4):
+    """
+    Pick the shallowest depth whose nodes give every worker several subproblems.
+    :param solution: CompactSolution with loaded arrays
+    :param workers: number of processes
+    :param tasks_per_worker: wanted number of subproblems per process, for load balancing
+    :return: (depth, prefixes)
+    """
+    # every try expands the levels above it again, only the prunes of the last one count
+    prune_counts = dict(solution.prune_counts)
+    depth = 1
+    prefixes = solution.subproblems(depth)
+    while len(prefixes) < workers * tasks_per_worker and depth < solution.n - 1:
+        depth += 1
+        solution.prune_counts.update(prune_counts)
+        prefixes = solution.subproblems(depth)
+    return depth, prefixes
+
+
+def solve_parallel(solution, workers, options):
+    """
+    Split the top levels of the tree of a CompactSolution into subproblems and solve them on a process
+    pool. Saves the optimum into solution.optimal_height / optimal_xs / optimal_ys, as the serial
+    pack_jobs does.
+    :param solution: CompactSolution with loaded arrays
+    :param workers: number of processes
+    :param options: keyword arguments of CompactSolution.prepare_search() for the workers
+    :return: None, raises SearchStopped if the budget of solution.set_budget() ran out
+    """
+    if solution.n < 2:
+        solution.pack_jobs(0, 0)
+        return
+    depth, prefixes = split_depth(solution, workers)
+    shared = multiprocessing.Value('d', solution.optimal_height, lock=False)
+    lock = multiprocessing.Lock()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(shared, lock)) as pool:
+        futures = [
+            pool.submit(solve_subproblem, solution.W, solution.widths, solution.heights, prefix, options,
+                        solution.deadline, solution.node_limit)
+            for prefix in prefixes]
+        frontier_bound = float('inf')
+        for future in as_completed(futures):
+            height, xs, ys, nodes, prune_counts, stopped_at = future.result()
+            if stopped_at is not None:
+                frontier_bound = min(frontier_bound, stopped_at)
+            solution.nodes += nodes
+            for name, count in prune_counts.items():
+                solution.prune_counts[name] += count
+            if height is not None and height < solution.optimal_height:
+                solution.optimal_height, solution.optimal_xs, solution.optimal_ys = height, xs, ys
+                solution.improved()
+    if frontier_bound < float('inf'):
+        raise SearchStopped(frontier_bound)
@@ -0,0 +1,237 @@
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+from .compact_solution import CompactSolution
+from .heuristics import HEURISTICS
+
+
+def canonical_order(jobs):
+    """
+    :param jobs: list of (width, height)
+    :return: indices of jobs in volume_sort order: non-increasing heights then areas. Jobs with the same
+    height and area are identical, so the sequence of sizes in this order only depends on the multiset
+    of jobs.
+    """
+    return sorted(range(len(jobs)), key=lambda k: (jobs[k][1], jobs[k][0] * jobs[k][1]), reverse=True)
+
+
+def cache_key(W, sizes, tag=''):
+    """
+    :param W: Specify the maximum amount of resource
+    :param sizes: (width, height) of the jobs in canonical order
+    :param tag: solver settings that change the answer, e.g. the heuristics of a warm started search, see
+    warm_tag()
+    :return: string key
+    """
+    return '%s|%d|%s' % (tag, W, ';'.join('%d,%d' % size for size in sizes))
+
+
+def warm_tag(warm_start):
+    """
+    :param warm_start: warm_start argument of CompactSolution.run_model()
+    :return: tag of cache_key(), the sorted names of the heuristics that run, '' for none
+    """
+    if not warm_start:
+        return ''
+    return 'warm:' + ','.join(sorted(set(HEURISTICS if warm_start is True else warm_start)))
+
+
+class ResultCache:
+    """
+    Persistent cache of solved instances, keyed by W and the multiset of (width, height), so the same jobs
+    in any order are solved only once.
+
+    Placements are stored in canonical order and mapped back to the order of the caller on a hit. Entries
+    live in a SQLite file shared by every process that opens it, with the most recently used ones also
+    kept in memory. Once the file holds more than max_entries results, the least recently used tenth is
+    evicted. Disk hits update the recency of their entry with the next store() or close(), not one commit
+    per lookup.
+    """
+
+    def __init__(self, path, max_entries=1000000, memory_size=10000):
+        """
+        :param path: SQLite file, created if missing, ':memory:' for a cache that is not kept
+        :param max_entries: results kept on disk
+        :param memory_size: results also kept in memory
+        """
+        self.max_entries = max_entries
+        self.memory_size = memory_size
+        self.memory = OrderedDict()
+        # key -> time of the last disk hit, not written yet
+        self.used = {}
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, used REAL NOT NULL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+        self.connection.commit()
+        # rows on disk, counted again before evicting since other processes may share the file
+        self.size = len(self)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def lookup(self, key):
+        """
+        :param key: see cache_key()
+        :return: (height, xs, ys) in canonical order, or None
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return value
+        row = self.connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.used[key] = time.time()
+        value = tuple(json.loads(row[0]))
+        self.remember(key, value)
+        self.hits += 1
+        return value
+
+    def store(self, key, height, xs, ys):
+        """
+        :param key: see cache_key()
+        :param height: optimal height
+        :param xs: x of every job in canonical order
+        :param ys: y of every job in canonical order
+        :return: None
+        """
+        value = (height, list(xs), list(ys))
+        self.flush_used()
+        if self.connection.execute('SELECT 1 FROM results WHERE key = ?', (key,)).fetchone() is None:
+            self.size += 1
+        self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                                (key, json.dumps(value), time.time()))
+        self.remember(key, value)
+        if self.size > self.max_entries:
+            self.size = len(self)
+        if self.size > self.max_entries:
+            # evict in chunks, so a full cache doesn't run a delete on every insert
+            count = self.size - self.max_entries + max(1, self.max_entries // 10)
+            evicted = [row[0] for row in
+                       self.connection.execute('SELECT key FROM results ORDER BY used LIMIT ?', (count,))]
+            self.connection.executemany('DELETE FROM results WHERE key = ?', [(k,) for k in evicted])
+            self.evictions += len(evicted)
+            self.size -= len(evicted)
+            for k in evicted:
+                self.memory.pop(k, None)
+        self.connection.commit()
+
+    def flush_used(self):
+        """
+        Write the recency of the disk hits since the last call, committed with the next commit.
+        :return: None
+        """
+        if self.used:
+            self.connection.executemany('UPDATE results SET used = ? WHERE key = ?',
+                                        [(used, key) for key, used in self.used.items()])
+            self.used.clear()
+
+    def get(self, W, jobs, tag=''):
+        """
+        :param W: Specify the maximum amount of resource
+        :param jobs: list of (width, height)
+        :param tag: see cache_key()
+        :return: (height, placements) with placements as (x, y) in the order of jobs, or None
+        """
+        order = canonical_order(jobs)
+        value = self.lookup(cache_key(W, [jobs[k] for k in order], tag))
+        if value is None:
+            return None
+        height, xs, ys = value
+        placements = [None] * len(jobs)
+        for k, x, y in zip(order, xs, ys):
+            placements[k] = (x, y)
+        return height, placements
+
+    def put(self, W, jobs, height, placements, tag=''):
+        """
+        :param W: Specify the maximum amount of resource
+        :param jobs: list of (width, height)
+        :param height: optimal height
+        :param placements: (x, y) in the order of jobs
+        :param tag: see cache_key()
+        :return: None
+        """
+        order = canonical_order(jobs)
+        self.store(cache_key(W, [jobs[k] for k in order], tag),
+                   height, [placements[k][0] for k in order], [placements[k][1] for k in order])
+
+    def clear(self):
+        self.connection.execute('DELETE FROM results')
+        self.connection.commit()
+        self.memory.clear()
+        self.used.clear()
+        self.size = 0
+
+    def close(self):
+        self.flush_used()
+        self.connection.commit()
+        self.connection.close()
+
+    def stats(self):
+        """
+        :return: dict of hit/miss counters
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self),
+            'memory_size': len(self.memory),
+        }
+
+
+class CachedSolution(CompactSolution):
+    """
+    CompactSolution that looks the jobs up in a ResultCache before searching, and stores every search
+    that ran to the end. jobs_sorted is already in canonical order, so the cached placements are used as
+    optimal_xs / optimal_ys directly.
+    """
+
+    def __init__(self, W, cache):
+        """
+        :param W: Specify the maximum amount of resource
+        :param cache: ResultCache
+        """
+        super().__init__(W)
+        self.cache = cache
+        self.cache_hit = False
+
+    def run_model(self, workers=1, bounds=('area',), warm_start=None, memo_size=0, symmetry=False,
+                  time_limit=None, node_limit=None, on_improve=None):
+        """
+        Same as CompactSolution.run_model(). Warm started results can be lower than the corner point
+        search and depend on the heuristics that ran, so they are cached apart from the others, per set of
+        heuristics. Searches stopped by their budget are not cached.
+        """
+        key = cache_key(self.W, [(job['width'], job['height']) for job in self.jobs_sorted], warm_tag(warm_start))
+        value = self.cache.lookup(key)
+        self.cache_hit = value is not None
+        if value is None:
+            super().run_model(workers, bounds, warm_start, memo_size, symmetry, time_limit, node_limit, on_improve)
+            if not self.stopped:
+                self.cache.store(key, self.optimal_height, self.optimal_xs, self.optimal_ys)
+            return
+        self.on_improve = on_improve
+        self.set_budget()
+        self.load_arrays()
+        self.nodes = 0
+        self.prune_counts = {}
+        self.lower_bound = 0
+        self.optimal_height, self.optimal_xs, self.optimal_ys = value[0], list(value[1]), list(value[2])
+        self.improved()
+        self.finish(self.optimal_height)
@@ -0,0 +1,413 @@
+"""
+Local scheduling service: accepts job lists over HTTP, on TCP or a Unix socket, and solves them on a
+process pool.
+
+    POST /solve     {"W": 8, "jobs": [[2, 3], [1, 4]], "time_limit": 0.5, "method": "exact", "options": {}}
+                    -> {"height": ..., "placements": [[x, y], ...], "stopped": ..., "gap": ..., ...}
+    GET  /metrics   queue depth, requests in flight, batch sizes and latency percentiles
+    GET  /health    {"status": "ok"}
+
+method is 'exact' (CompactSolution.run_model, options are the keyword arguments of it listed in OPTIONS)
+or a heuristic name of heuristics.HEURISTICS. time_limit is the deadline of the whole request, queueing
+included: the exact search is started with what is left of it and returns its incumbent when it runs
+out, warm started by default so there always is one, and a request whose deadline passed before it
+reached a worker gets the skyline packing. Requests with at most small_jobs jobs are collected for up to
+batch_delay seconds and sent to the pool together, so tiny instances don't pay one inter-process round
+trip each.
+
+    python -m Exact_Algorithm.scheduling_service --port 8080 --workers 4
+    curl -d '{"W": 8, "jobs": [[2, 3], [1, 4]]}' localhost:8080/solve
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import math
+import os
+import socket
+import statistics
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .compact_solution import CompactSolution
+from .heuristics import HEURISTICS, get_heuristic
+from .lower_bounds import BOUNDS
+
+# run_model keyword arguments a request may set, the deadline comes from time_limit and workers would
+# nest process pools
+OPTIONS = ('bounds', 'warm_start', 'memo_size', 'symmetry', 'node_limit')
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error'}
+
+
+def solve_request(W, jobs, method, deadline, options):
+    """
+    Solve one request inside a pool process.
+    :param W: Specify the maximum amount of resource
+    :param jobs: list of (width, height)
+    :param method: 'exact' or a heuristic name
+    :param deadline: time.monotonic() at which the answer is due, None for no limit. The monotonic clock
+    is shared by the processes of one machine.
+    :param options: keyword arguments of CompactSolution.run_model()
+    :return: dict with 'method', 'height', 'placements', 'stopped' and, for exact, the rest of result()
+    """
+    time_limit = None
+    if deadline is not None:
+        time_limit = deadline - time.monotonic()
+        if time_limit <= 0:
+            method = 'skyline'
+    if method != 'exact':
+        start_time = time.perf_counter()
+        height, placements = get_heuristic(method)(W, jobs)
+        return {'method': method, 'height': height, 'placements': placements,
+                'stopped': time_limit is not None and time_limit <= 0,
+                'elapsed_time': time.perf_counter() - start_time}
+    if time_limit is not None or options.get('node_limit') is not None:
+        # a search stopped by its budget returns the incumbent, the heuristics make sure there is one
+        options = dict(options)
+        options.setdefault('warm_start', True)
+    solution = CompactSolution(W)
+    solution.load_jobs([{'width': w, 'height': h} for w, h in jobs])
+    solution.run_model(time_limit=time_limit, **options)
+    result = solution.result()
+    result['method'] = method
+    return result
+
+
+def solve_requests(requests):
+    """
+    :param requests: list of argument tuples of solve_request()
+    :return: list of results, one per request, {'error': message} for a request with bad options
+    """
+    results = []
+    for request in requests:
+        try:
+            results.append(solve_request(*request))
+        except (TypeError, ValueError) as error:
+            # one bad request must not fail the others of its batch
+            results.append({'error': str(error)})
+    return results
+
+
+def check_options(options):
+    """
+    Check the values of the run_model options of a request, so a bad one is refused before it reaches a
+    batch.
+    :param options: decoded JSON object
+    :return: None
+    """
+    if not isinstance(options, dict) or not set(options) <= set(OPTIONS):
+        raise ValueError('options must be an object with keys among %s' % ', '.join(OPTIONS))
+    bounds = options.get('bounds', [])
+    if not isinstance(bounds, list) or not all(isinstance(name, str) and name in BOUNDS for name in bounds):
+        raise ValueError('bounds must be a list of names among %s' % ', '.join(BOUNDS))
+    warm_start = options.get('warm_start', False)
+    if not isinstance(warm_start, bool) and not (
+            isinstance(warm_start, list) and all(isinstance(name, str) and name in HEURISTICS for name in warm_start)):
+        raise ValueError('warm_start must be true, false or a list of names among %s' % ', '.join(HEURISTICS))
+    for key in ('memo_size', 'node_limit'):
+        value = options.get(key, 0)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 0):
+            raise ValueError('%s must be a non-negative integer' % key)
+    if not isinstance(options.get('symmetry', False), bool):
+        raise ValueError('symmetry must be true or false')
+
+
+def parse_request(body):
+    """
+    Check a /solve body.
+    :param body: decoded JSON
+    :return: (W, jobs, method, time_limit, options)
+    """
+    if not isinstance(body, dict):
+        raise ValueError('Request body must be a JSON object')
+    W = body.get('W')
+    if not isinstance(W, int) or W < 1:
+        raise ValueError('W must be a positive integer')
+    jobs = body.get('jobs')
+    if not isinstance(jobs, list):
+        raise ValueError('jobs must be a list of [width, height]')
+    for job in jobs:
+        if not (isinstance(job, list) and len(job) == 2 and all(isinstance(v, int) for v in job)):
+            raise ValueError('jobs must be a list of [width, height]')
+        if not 1 <= job[0] <= W or job[1] < 1:
+            raise ValueError('Job %r does not fit, widths must be in [1, W] and heights positive' % job)
+    method = body.get('method', 'exact')
+    if method != 'exact' and method not in HEURISTICS:
+        raise ValueError('Unknown method %r, choose from exact, %s' % (method, ', '.join(HEURISTICS)))
+    time_limit = body.get('time_limit')
+    if time_limit is not None and (not isinstance(time_limit, (int, float)) or time_limit < 0):
+        raise ValueError('time_limit must be a non-negative number of seconds')
+    options = body.get('options', {})
+    check_options(options)
+    return W, [tuple(job) for job in jobs], method, time_limit, options
+
+
+class SchedulingService:
+    """
+    Request queue, batcher and process pool behind the HTTP handler.
+    """
+
+    def __init__(self, workers=None, small_jobs=10, batch_size=16, batch_delay=0.002, default_time_limit=None,
+                 latency_window=1000):
+        """
+        :param workers: pool processes, None for os.cpu_count()
+        :param small_jobs: requests with at most this many jobs are batched
+        :param batch_size: most requests per batch
+        :param batch_delay: seconds a batch waits for more requests once it has one
+        :param default_time_limit: time_limit of requests that don't set one, None for no limit
+        :param latency_window: number of recent requests the latency percentiles are taken over
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.small_jobs = small_jobs
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.default_time_limit = default_time_limit
+        self.pool = None
+        self.queue = None
+        self.batcher_task = None
+        self.tasks = set()
+        self.latencies = deque(maxlen=latency_window)
+        self.in_flight = 0
+        self.requests = 0
+        self.completed = 0
+        self.errors = 0
+        self.stopped = 0
+        self.batches = 0
+        self.batched_requests = 0
+
+    async def start(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.queue = asyncio.Queue()
+        self.batcher_task = asyncio.create_task(self.batcher())
+
+    async def stop(self):
+        self.batcher_task.cancel()
+        for task in list(self.tasks):
+            task.cancel()
+        self.pool.shutdown(cancel_futures=True)
+
+    async def solve(self, W, jobs, method='exact', time_limit=None, options=None):
+        """
+        :return: result dict of solve_request(), with the 'latency' of the request in seconds
+        """
+        start_time = time.monotonic()
+        if time_limit is None:
+            time_limit = self.default_time_limit
+        deadline = start_time + time_limit if time_limit is not None else None
+        future = asyncio.get_running_loop().create_future()
+        item = ((W, jobs, method, deadline, options or {}), future)
+        self.requests += 1
+        if len(jobs) <= self.small_jobs:
+            await self.queue.put(item)
+        else:
+            self.dispatch([item])
+        try:
+            result = await future
+        except Exception:
+            self.errors += 1
+            raise
+        result['latency'] = time.monotonic() - start_time
+        self.latencies.append(result['latency'])
+        self.completed += 1
+        if result['stopped']:
+            self.stopped += 1
+        return result
+
+    async def batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            end = loop.time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                timeout = end - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.dispatch(batch)
+
+    def dispatch(self, batch):
+        task = asyncio.create_task(self.run_batch(batch))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run_batch(self, batch):
+        self.batches += 1
+        self.batched_requests += len(batch)
+        self.in_flight += len(batch)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.pool, solve_requests, [request for request, future in batch])
+        except Exception as error:
+            for request, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        finally:
+            self.in_flight -= len(batch)
+        for (request, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if 'error' in result:
+                future.set_exception(ValueError(result['error']))
+            else:
+                future.set_result(result)
+
+    def metrics(self):
+        latencies = sorted(self.latencies)
+        return {
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'completed': self.completed,
+            'errors': self.errors,
+            'stopped': self.stopped,
+            'batches': self.batches,
+            'mean_batch_size': self.batched_requests / self.batches if self.batches else 0,
+            'latency': {
+                'median': statistics.median(latencies) if latencies else None,
+                'p95': latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)] if latencies else None,
+                'max': latencies[-1] if latencies else None,
+            },
+        }
+
+    async def route(self, method, path, body):
+        """
+        :return: (status, payload)
+        """
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/metrics':
+            return 200, self.metrics()
+        if path != '/solve':
+            return 404, {'error': 'Unknown path %s' % path}
+        if method != 'POST':
+            return 405, {'error': 'Use POST for /solve'}
+        try:
+            W, jobs, solver, time_limit, options = parse_request(json.loads(body or b'null'))
+        except ValueError as error:
+            return 400, {'error': str(error)}
+        try:
+            return 200, await self.solve(W, jobs, solver, time_limit, options)
+        except ValueError as error:
+            # bad run_model options surface in the worker
+            return 400, {'error': str(error)}
+        except Exception as error:
+            return 500, {'error': '%s: %s' % (type(error).__name__, error)}
+
+    async def handle(self, reader, writer):
+        """
+        Serve one HTTP/1.1 request per connection.
+        """
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            try:
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, separator, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+            except (ValueError, asyncio.IncompleteReadError):
+                status, payload = 400, {'error': 'Malformed HTTP request'}
+            else:
+                status, payload = await self.route(method, path.split('?')[0], body)
+            try:
+                data = json.dumps(payload, allow_nan=False).encode()
+            except ValueError as error:
+                status, payload = 500, {'error': 'Result is not valid JSON: %s' % error}
+                data = json.dumps(payload).encode()
+            writer.write(b'HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n'
+                         b'Connection: close\r\n\r\n' % (status, REASONS[status].encode(), len(data)) + data)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(service, host='127.0.0.1', port=8080, unix_path=None, on_ready=None):
+    """
+    Run the service until cancelled.
+    :param service: SchedulingService
+    :param host: TCP address, localhost by default
+    :param port: TCP port, 0 for any free one
+    :param unix_path: serve on this Unix socket instead of TCP
+    :param on_ready: callback(address) once the server listens, address as given by getsockname(), e.g.
+    to learn the port picked for port 0
+    :return: None
+    """
+    await service.start()
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(service.handle, path=unix_path)
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+    if on_ready is not None:
+        on_ready(server.sockets[0].getsockname())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def call_service(path, body=None, host='127.0.0.1', port=8080, unix_path=None, timeout=None):
+    """
+    Blocking client of the service.
+    :param path: /solve, /metrics or /health
+    :param body: dict sent as JSON with POST, None for GET
+    :return: (status, decoded JSON answer)
+    """
+    if unix_path is not None:
+        connection = UnixHTTPConnection(unix_path, timeout)
+    else:
+        connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        if body is None:
+            connection.request('GET', path)
+        else:
+            connection.request('POST', path, json.dumps(body), {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the strip packing solvers over local HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--unix', help='serve on this Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, help='pool processes, default: all CPUs')
+    parser.add_argument('--small-jobs', type=int, default=10, help='requests with at most this many jobs are batched')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--batch-delay', type=float, default=0.002, help='seconds')
+    parser.add_argument('--time-limit', type=float, help='default deadline of a request, seconds')
+    args = parser.parse_args()
+
+    service = SchedulingService(args.workers, args.small_jobs, args.batch_size, args.batch_delay, args.time_limit)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,255 @@
+import heapq
+import os
+import pickle
+
+from .compact_solution import CompactSolution, SearchStopped
+
+ORDERS = ('depth_first', 'best_first', 'discrepancy')
+
+
+class IterativeSolution(CompactSolution):
+    """
+    CompactSolution whose pack_jobs walks the tree with an explicit list of open nodes instead of Python
+    recursion, so the depth is not capped by the recursion limit and the search can be paused, saved
+    and resumed. Every open node carries a snapshot of its envelope and placements, so nodes can be
+    expanded in any order:
+    - depth_first: same order as the recursive pack_jobs.
+    - best_first: lowest lower bound first (height so far or area bound), deeper nodes first on ties.
+    - discrepancy: limited discrepancy search. Depth first runs with a growing budget of how many times
+      a node may be left through another corner than its first one, so good dives come early; the last
+      run, the one that never hits the budget, is a full search.
+    Pruning is the same as in pack_jobs: height, lower bounds, memo and symmetry breaking.
+    """
+
+    def __init__(self, W, order='depth_first', checkpoint_path=None, checkpoint_every=100000):
+        """
+        :param W: Specify the maximum amount of resource
+        :param order: node order, one of ORDERS
+        :param checkpoint_path: file the open nodes are saved to, None for no checkpoints
+        :param checkpoint_every: number of expanded nodes between two checkpoints
+        """
+        if order not in ORDERS:
+            raise ValueError('Unknown node order %r, choose from %s' % (order, ', '.join(ORDERS)))
+        super().__init__(W)
+        self.order = order
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.options = {}
+        self.open = []
+        self.root = None
+        self.budget = 0
+        self.budget_hit = False
+        self.pushed = 0
+
+    def prepare_search(self, bounds=('area',), memo_size=0, symmetry=False):
+        self.options = {'bounds': tuple(bounds), 'memo_size': memo_size, 'symmetry': symmetry}
+        super().prepare_search(bounds, memo_size, symmetry)
+
+    def pack_jobs(self, i, overall_height):
+        """
+        Search the subtree below the current placement of jobs 0..i-1.
+        :param i: index of the next job in jobs_sorted
+        :param overall_height: the highest end-point of jobs 0..i-1
+        :return: None
+        """
+        previous = self.level_corners[i - 1] if i and self.symmetry else None
+        self.root = (i, overall_height, tuple(self.envelope.rights), tuple(self.envelope.tops),
+                     self.envelope.area, tuple(self.xs[:i]), tuple(self.ys[:i]), previous, 0)
+        self.budget = 0
+        self.budget_hit = False
+        self.open = []
+        self.push(self.root)
+        self.search()
+
+    def push(self, node):
+        if self.order == 'best_first':
+            i, overall_height = node[0], node[1]
+            priority = max(overall_height, (node[4] + self.suffix_area[i]) / self.W)
+            self.pushed += 1
+            heapq.heappush(self.open, (priority, -i, self.pushed, node))
+        else:
+            self.open.append(node)
+
+    def pop(self):
+        if self.order == 'best_first':
+            priority, depth, count, node = heapq.heappop(self.open)
+            return priority, node
+        return None, self.open.pop()
+
+    def search(self):
+        """
+        Expand open nodes until none is left, starting over with a larger budget for discrepancy order.
+        :return: None
+        """
+        while True:
+            while self.open:
+                if self.nodes >= self.next_check and self.out_of_budget():
+                    raise SearchStopped(self.frontier_bound())
+                priority, node = self.pop()
+                # the best open node can't beat the incumbent, neither can the others
+                if priority is not None and priority >= self.optimal_height:
+                    self.open = []
+                    break
+                for child in reversed(self.expand(node)):
+                    self.push(child)
+                if self.optimal_height <= self.lower_bound:
+                    self.open = []
+                if self.checkpoint_path and self.nodes % self.checkpoint_every == 0:
+                    self.checkpoint(self.checkpoint_path)
+            if self.order != 'discrepancy' or not self.budget_hit:
+                return
+            self.budget += 1
+            self.budget_hit = False
+            # states were only explored up to the budget, they can't prune the next run
+            if self.table is not None:
+                self.table.clear()
+            self.push(self.root)
+
+    def frontier_bound(self):
+        """
+        :return: lower bound of the open nodes. Discrepancy order also skipped nodes over the budget, so
+        only the root bound is known.
+        """
+        if self.order == 'discrepancy':
+            return self.lower_bound
+        frontier_bound = float('inf')
+        for item in self.open:
+            node = item[3] if self.order == 'best_first' else item
+            self.load_node(node)
+            frontier_bound = min(frontier_bound, self.node_bound(node[0], node[1]))
+        return frontier_bound
+
+    def load_node(self, node):
+        i, overall_height, rights, tops, area, xs, ys, previous, discrepancies = node
+        envelope = self.envelope
+        envelope.rights = list(rights)
+        envelope.tops = list(tops)
+        envelope.area = area
+        envelope.history = []
+        self.xs[:i] = xs
+        self.ys[:i] = ys
+        if previous is not None:
+            self.level_corners[i - 1] = previous
+
+    def expand(self, node):
+        """
+        Same tests as pack_jobs on one node.
+        :param node: open node
+        :return: child nodes, in the order pack_jobs would visit them
+        """
+        self.load_node(node)
+        i, overall_height = node[0], node[1]
+        discrepancies = node[8]
+        envelope = self.envelope
+        self.nodes += 1
+        if i != 0:
+            if overall_height >= self.optimal_height:
+                self.prune_counts['height'] += 1
+                return []
+            for bound in self.bounds:
+                if bound.node(self, i) >= self.optimal_height:
+                    self.prune_counts[bound.name] += 1
+                    return []
+            if i == self.n:
+                self.update_optimal(overall_height)
+                return []
+
+        corners = envelope.corners(self.W - self.suffix_min_width[i])
+        if self.table is not None and not (self.symmetry and self.same_as_previous[i]) and \
+                self.table.seen(i, self.n, overall_height, corners):
+            self.prune_counts['memo'] += 1
+            return []
+        if self.symmetry:
+            corners = self.symmetric_corners(i, corners)
+        previous = self.level_corners[i] if self.symmetry else None
+        width = self.widths[i]
+        height = self.heights[i]
+        limit = self.W - width
+        xs = node[5]
+        ys = node[6]
+        children = []
+        for x, y in corners:
+            if x > limit:
+                continue
+            if self.order == 'discrepancy':
+                # leaving through any corner but the first costs one discrepancy
+                child_discrepancies = discrepancies + (1 if children else 0)
+                if child_discrepancies > self.budget:
+                    self.budget_hit = True
+                    break
+            else:
+                child_discrepancies = 0
+            top = y + height
+            envelope.place(x, y, width, height)
+            children.append((i + 1, top if top > overall_height else overall_height,
+                             tuple(envelope.rights), tuple(envelope.tops), envelope.area,
+                             xs + (x,), ys + (y,), previous, child_discrepancies))
+            envelope.undo()
+        return children
+
+    def checkpoint(self, path):
+        """
+        Save the open nodes, the incumbent and the counters, see resume_model().
+        :param path: checkpoint file, replaced atomically
+        :return: None
+        """
+        position = {id(job): k for k, job in enumerate(self.jobs)}
+        state = {
+            'W': self.W,
+            'jobs': [(job['width'], job['height']) for job in self.jobs],
+            # position in jobs of every job of jobs_sorted, so placements() keeps the caller's order
+            'sorted_positions': [position[id(job)] for job in self.jobs_sorted],
+            'order': self.order,
+            'options': self.options,
+            'open': self.open,
+            'root': self.root,
+            'budget': self.budget,
+            'budget_hit': self.budget_hit,
+            'pushed': self.pushed,
+            'optimal_height': self.optimal_height,
+            'optimal_xs': self.optimal_xs,
+            'optimal_ys': self.optimal_ys,
+            'nodes': self.nodes,
+            'prune_counts': self.prune_counts,
+        }
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(state, f)
+        os.replace(path + '.tmp', path)
+
+    def resume_model(self, path, time_limit=None, node_limit=None, on_improve=None):
+        """
+        Continue a search saved by checkpoint(), possibly in another process, and save the optimal packing
+        into self.optimal_jobs as run_model does. The memo starts empty again.
+        :param path: checkpoint file
+        :param time_limit: see run_model()
+        :param node_limit: see run_model(), counts the nodes expanded before the checkpoint too
+        :param on_improve: see run_model()
+        :return: None
+        """
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        self.W = state['W']
+        self.order = state['order']
+        self.jobs = [{'x': 0, 'y': 0, 'width': w, 'height': h} for w, h in state['jobs']]
+        self.jobs_sorted = [self.jobs[k] for k in state['sorted_positions']]
+        self.load_arrays()
+        self.prepare_search(**state['options'])
+        self.on_improve = on_improve
+        self.set_budget(time_limit, node_limit)
+        self.open = state['open']
+        self.root = state['root']
+        self.budget = state['budget']
+        self.budget_hit = state['budget_hit']
+        self.pushed = state['pushed']
+        self.optimal_height = state['optimal_height']
+        self.optimal_xs = state['optimal_xs']
+        self.optimal_ys = state['optimal_ys']
+        self.nodes = state['nodes']
+        self.prune_counts = state['prune_counts']
+        try:
+            self.search()
+            frontier_bound = self.optimal_height
+        except SearchStopped as stop:
+            self.stopped = True
+            frontier_bound = stop.frontier_bound
+        self.finish(frontier_bound)
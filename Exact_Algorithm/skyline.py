@@ -0,0 +1,131 @@
+class Envelope:
+    """
+    Incremental envelope (skyline) of the jobs already in the bin.
+
+    The envelope is the staircase formed by the extreme items of the packing: steps are kept as two
+    parallel lists, rights[k] and tops[k], with rights increasing and tops decreasing, so step k covers
+    [rights[k - 1], rights[k]) at height tops[k]. Placing a job only touches the steps it dominates, and
+    every placement is recorded so the search can roll it back with undo() when it backtracks. Corner
+    points are read straight off the steps, without sorting the jobs in the bin.
+    """
+
+    __slots__ = ('W', 'rights', 'tops', 'area', 'history')
+
+    def __init__(self, W):
+        """
+        :param W: Specify the maximum amount of resource
+        """
+        self.W = W
+        self.rights = []
+        self.tops = []
+        # area below the staircase, i.e. the packed area used by the area early stop
+        self.area = 0
+        self.history = []
+
+    def __len__(self):
+        return len(self.tops)
+
+    @property
+    def height(self):
+        """
+        :return: the highest end-point of the jobs in the bin
+        """
+        return self.tops[0] if self.tops else 0
+
+    def height_at(self, x):
+        """
+        Height of the staircase right of x, i.e. the lowest y a job starting at x or further left can get.
+        :param x: position between 0 and W
+        :return: height
+        """
+        for right, top in zip(self.rights, self.tops):
+            if right > x:
+                return top
+        return 0
+
+    def reset(self):
+        self.rights = []
+        self.tops = []
+        self.area = 0
+        self.history = []
+
+    def place(self, x, y, width, height):
+        """
+        Put a job on the corner point (x, y) and update the steps it dominates.
+        :param x: x of a corner point returned by corners()
+        :param y: y of the same corner point
+        :param width: width of the job
+        :param height: height of the job
+        :return: None
+        """
+        rights = self.rights
+        tops = self.tops
+        right = x + width
+        top = y + height
+        m = len(tops)
+        # steps [a, b) are dominated by the new job: not higher and not further right
+        a = 0
+        while a < m and tops[a] > top:
+            a += 1
+        x_start = rights[a - 1] if a else 0
+        x_prev = x_start
+        old_area = 0
+        b = a
+        while b < m and rights[b] <= right:
+            old_area += (rights[b] - x_prev) * tops[b]
+            x_prev = rights[b]
+            b += 1
+        if b < m:
+            old_area += (right - x_prev) * tops[b]
+        delta = (right - x_start) * top - old_area
+        self.history.append((a, rights[a:b], tops[a:b], delta))
+        rights[a:b] = [right]
+        tops[a:b] = [top]
+        self.area += delta
+
+    def undo(self):
+        """
+        Roll back the last place().
+        :return: None
+        """
+        a, old_rights, old_tops, delta = self.history.pop()
+        self.rights[a:a + 1] = old_rights
+        self.tops[a:a + 1] = old_tops
+        self.area -= delta
+
+    def corners(self, limit=None):
+        """
+        Find corner points of the envelope.
+        :param limit: largest x worth returning, usually W minus the minimum width of the unpacked jobs
+        :return: corner points in increasing x
+        """
+        if limit is None:
+            limit = self.W
+        corners = []
+        x_prev = 0
+        for right, top in zip(self.rights, self.tops):
+            if x_prev > limit:
+                return corners
+            corners.append((x_prev, top))
+            x_prev = right
+        if x_prev <= limit:
+            corners.append((x_prev, 0))
+        return corners
+
+    @classmethod
+    def from_jobs(cls, W, jobs):
+        """
+        Build the envelope of jobs that are already placed, e.g. an ExactSolution.optimal_jobs list.
+        :param W: Specify the maximum amount of resource
+        :param jobs: list of dicts with 'x', 'y', 'width' and 'height'
+        :return: Envelope
+        """
+        envelope = cls(W)
+        for job in sorted(jobs, key=lambda job: (job['y'] + job['height'], job['x'] + job['width']), reverse=True):
+            right = job['x'] + job['width']
+            if not envelope.rights or right > envelope.rights[-1]:
+                x_prev = envelope.rights[-1] if envelope.rights else 0
+                envelope.area += (right - x_prev) * (job['y'] + job['height'])
+                envelope.rights.append(right)
+                envelope.tops.append(job['y'] + job['height'])
+        return envelope
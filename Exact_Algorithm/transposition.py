@@ -0,0 +1,103 @@
+from collections import OrderedDict, deque
+
+
+def dominates(low, high):
+    """
+    Compare two envelopes given by their corner points up to the same limit.
+    :param low: corner points of the first envelope, as returned by Envelope.corners()
+    :param high: corner points of the second envelope
+    :return: True if the first envelope is nowhere above the second one
+    """
+    k = 0
+    last = len(high) - 1
+    for j, (_, y) in enumerate(low):
+        if j + 1 < len(low):
+            # high is lowest just before the next corner of low
+            end = low[j + 1][0]
+            while k < last and high[k + 1][0] < end:
+                k += 1
+            if high[k][1] < y:
+                return False
+        elif high[last][1] < y:
+            return False
+    return True
+
+
+class TranspositionTable:
+    """
+    Memo of the states pack_jobs has already explored, to prune the same partial packing reached through
+    a different order of corner choices.
+
+    At depth i the remaining jobs are always jobs_sorted[i:], and only the envelope up to W minus their
+    minimum width can still hold a corner, so a state is keyed by (i, overall height, corner points up to
+    that limit). A state is pruned if the same key was explored before, or if a recently explored state
+    at the same depth is nowhere higher: placing the same jobs on the lower envelope always ends at most
+    as high, so the higher one can't beat the incumbent that exploration left behind.
+    """
+
+    def __init__(self, max_size=100000, window=8, min_remaining=2):
+        """
+        :param max_size: number of keys kept, the least recently used one is evicted first
+        :param window: number of recent states per depth checked for dominance
+        :param min_remaining: states with fewer jobs left are cheaper to search than to store
+        """
+        self.max_size = max_size
+        self.window = window
+        self.min_remaining = min_remaining
+        self.entries = OrderedDict()
+        self.recent = {}
+        self.hits = 0
+        self.dominated = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+        self.recent = {}
+        self.hits = self.dominated = self.misses = self.evictions = 0
+
+    def seen(self, i, n, overall_height, corners):
+        """
+        Look the state up and remember it if it is new.
+        :param i: index of the next job in jobs_sorted
+        :param n: number of jobs
+        :param overall_height: the highest end-point of jobs 0..i-1
+        :param corners: corner points of the envelope up to W minus the minimum remaining width
+        :return: True if the state can be pruned
+        """
+        if n - i < self.min_remaining:
+            return False
+        key = (i, overall_height, tuple(corners))
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True
+        recent = self.recent.get(i)
+        if recent is None:
+            recent = self.recent[i] = deque(maxlen=self.window)
+        for height, explored in recent:
+            if height <= overall_height and dominates(explored, corners):
+                self.dominated += 1
+                return True
+        self.misses += 1
+        self.entries[key] = None
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        recent.append((overall_height, corners))
+        return False
+
+    def stats(self):
+        """
+        :return: dict of hit/miss counters
+        """
+        return {
+            'hits': self.hits,
+            'dominated': self.dominated,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+        }
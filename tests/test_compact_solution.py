@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from Exact_Algorithm import height_area_early_stop
+from Exact_Algorithm.compact_solution import CompactSolution
+from Exact_Algorithm.model_solution import check_packing
+
+
+def random_instances(count, seed=0):
+    rng = random.Random(seed)
+    for k in range(count):
+        W = rng.randint(4, 8)
+        yield W, [(rng.randint(1, W // 2 + 1), rng.randint(1, 5)) for _ in range(rng.randint(1, 11))]
+
+
+def original_height(W, jobs):
+    solution = height_area_early_stop.ExactSolution(W)
+    solution.jobs = [{'x': 0, 'y': 0, 'width': w, 'height': h} for w, h in jobs]
+    solution.volume_sort()
+    solution.run_model()
+    return solution.optimal_height
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'bounds': ('tallest', 'continuous', 'mmv', 'dff')},
+    {'bounds': ('tallest', 'continuous', 'mmv'), 'memo_size': 1000, 'symmetry': True},
+])
+def test_same_height_as_the_original_solver(options):
+    for W, jobs in random_instances(30):
+        solution = CompactSolution(W)
+        solution.load_jobs([{'width': w, 'height': h} for w, h in jobs])
+        solution.run_model(**options)
+        assert solution.optimal_height == original_height(W, jobs), (W, jobs)
+        assert check_packing(W, jobs, solution.optimal_height, solution.placements()) == [], (W, jobs)
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from Exact_Algorithm.compact_solution import CompactSolution
+from Exact_Algorithm.lower_bounds import BOUNDS
+from Exact_Algorithm.model_solution import ModelSolution, check_packing, cross_check
+
+ENGINE_PACKAGES = [('cp_sat', 'ortools'), ('milp', 'pulp')]
+
+
+def random_instances(count, seed=0):
+    rng = random.Random(seed)
+    for k in range(count):
+        W = rng.randint(4, 8)
+        yield W, [(rng.randint(1, W), rng.randint(1, 6)) for _ in range(rng.randint(3, 8))]
+
+
+def model_height(W, jobs, **options):
+    solution = ModelSolution(W)
+    solution.load_jobs([{'width': w, 'height': h} for w, h in jobs])
+    solution.run_model(**options)
+    assert check_packing(W, jobs, solution.optimal_height, solution.placements()) == []
+    return solution
+
+
+@pytest.mark.parametrize('engine, package', ENGINE_PACKAGES)
+@pytest.mark.parametrize('bound', sorted(BOUNDS))
+def test_every_bound_runs_on_every_engine(engine, package, bound):
+    pytest.importorskip(package)
+    W, jobs = 8, [(3, 4), (5, 4), (2, 3), (6, 2), (4, 2), (1, 5), (3, 1)]
+    solution = model_height(W, jobs, bounds=(bound,), engine=engine)
+    assert not solution.stopped
+    assert solution.optimal_height == 9
+
+
+def test_engine_is_keyword_only():
+    solution = ModelSolution(4)
+    solution.load_jobs([{'width': 2, 'height': 3}, {'width': 2, 'height': 3}])
+    solution.run_model(2, engine='search')
+    assert solution.engine == 'search'
+    assert solution.optimal_height == 3
+
+
+def test_engines_agree_with_the_search():
+    pytest.importorskip('ortools')
+    pytest.importorskip('pulp')
+    for W, jobs in random_instances(20):
+        cp_sat = model_height(W, jobs, engine='cp_sat').optimal_height
+        milp = model_height(W, jobs, engine='milp').optimal_height
+        assert cp_sat == milp, (W, jobs)
+        search = CompactSolution(W)
+        search.load_jobs([{'width': w, 'height': h} for w, h in jobs])
+        search.run_model(bounds=('tallest', 'continuous', 'mmv'), warm_start=True)
+        # the corner point search keeps the order of jobs_sorted, it can only miss lower packings
+        assert search.optimal_height >= cp_sat, (W, jobs)
+        assert cross_check(W, jobs, 'cp_sat')['ok'], (W, jobs)
@@ -0,0 +1,41 @@
+import random
+
+from Exact_Algorithm.compact_solution import CompactSolution
+from Exact_Algorithm.model_solution import check_packing
+from Exact_Algorithm.parallel_search import split_depth
+
+
+def load(W, jobs):
+    solution = CompactSolution(W)
+    solution.load_jobs([{'width': w, 'height': h} for w, h in jobs])
+    return solution
+
+
+def test_parallel_equals_serial():
+    rng = random.Random(1)
+    for k in range(6):
+        W = rng.randint(5, 8)
+        jobs = [(rng.randint(1, W // 2 + 1), rng.randint(1, 5)) for _ in range(rng.randint(6, 10))]
+        serial = load(W, jobs)
+        serial.run_model(bounds=('tallest', 'continuous', 'mmv'))
+        for options in ({}, {'symmetry': True}):
+            parallel = load(W, jobs)
+            parallel.run_model(2, ('tallest', 'continuous', 'mmv'), **options)
+            assert parallel.optimal_height == serial.optimal_height, (W, jobs, options)
+            assert check_packing(W, jobs, parallel.optimal_height, parallel.placements()) == [], (W, jobs)
+
+
+def test_split_counts_symmetry_prunes_once():
+    jobs = [{'width': 2, 'height': 3}] * 4 + [{'width': 1, 'height': 2}] * 4
+    split = CompactSolution(8)
+    split.load_jobs(jobs)
+    split.load_arrays()
+    split.prepare_search(symmetry=True)
+    depth, prefixes = split_depth(split, 8)
+    assert depth > 1
+    direct = CompactSolution(8)
+    direct.load_jobs(jobs)
+    direct.load_arrays()
+    direct.prepare_search(symmetry=True)
+    assert direct.subproblems(depth) == prefixes
+    assert split.prune_counts['symmetry'] == direct.prune_counts['symmetry']
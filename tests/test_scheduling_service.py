@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+import pytest
+
+from Exact_Algorithm.scheduling_service import SchedulingService, call_service, serve
+
+
+@pytest.fixture(scope='module')
+def port():
+    ready = threading.Event()
+    state = {}
+
+    def on_ready(address):
+        state['port'] = address[1]
+        state['loop'] = asyncio.get_running_loop()
+        state['task'] = asyncio.current_task()
+        ready.set()
+
+    def run():
+        try:
+            asyncio.run(serve(SchedulingService(workers=1), port=0, on_ready=on_ready))
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(30)
+    yield state['port']
+    state['loop'].call_soon_threadsafe(state['task'].cancel)
+    thread.join(30)
+
+
+def test_health(port):
+    assert call_service('/health', port=port, timeout=30) == (200, {'status': 'ok'})
+
+
+def test_exact_and_heuristic(port):
+    body = {'W': 8, 'jobs': [[2, 3], [1, 4], [8, 1]]}
+    status, result = call_service('/solve', body, port=port, timeout=30)
+    assert status == 200
+    assert result['height'] == 5 and not result['stopped']
+    status, result = call_service('/solve', dict(body, method='nfdh'), port=port, timeout=30)
+    assert status == 200
+    assert result['method'] == 'nfdh' and len(result['placements']) == 3
+
+
+def test_node_limit_alone_returns_a_packing(port):
+    body = {'W': 8, 'jobs': [[2, 3], [1, 4]], 'options': {'node_limit': 1}}
+    status, result = call_service('/solve', body, port=port, timeout=30)
+    assert status == 200
+    assert result['height'] == 4
+    assert None not in result['placements']
+
+
+def test_bad_requests(port):
+    status, result = call_service('/solve', {'W': 4, 'jobs': [[5, 1]]}, port=port, timeout=30)
+    assert status == 400
+    body = {'W': 4, 'jobs': [[1, 1]], 'options': {'warm_start': ['nope']}}
+    status, result = call_service('/solve', body, port=port, timeout=30)
+    assert status == 400 and 'warm_start' in result['error']
+    assert call_service('/nowhere', port=port, timeout=30)[0] == 404
+
+
+def test_metrics_count_requests(port):
+    call_service('/solve', {'W': 4, 'jobs': [[1, 1]]}, port=port, timeout=30)
+    status, metrics = call_service('/metrics', port=port, timeout=30)
+    assert status == 200
+    assert metrics['completed'] >= 1 and metrics['batches'] >= 1
@@ -0,0 +1,35 @@
+import pytest
+
+from Exact_Algorithm.compact_solution import CompactSolution
+from Exact_Algorithm.search_engine import ORDERS, IterativeSolution
+
+
+def jobs_of(seed):
+    solution = CompactSolution(8)
+    solution.gen_uniform_jobs(14, 1, 4, 1, 5, seed=seed)
+    return [{'width': job['width'], 'height': job['height']} for job in solution.jobs]
+
+
+@pytest.mark.parametrize('order', ORDERS)
+def test_resume_reaches_the_optimum_in_the_callers_order(order, tmp_path):
+    path = str(tmp_path / 'search.pkl')
+    for seed in range(2):
+        jobs = jobs_of(seed)
+        full = CompactSolution(8)
+        full.load_jobs(jobs)
+        full.run_model()
+
+        stopped = IterativeSolution(8, order, checkpoint_path=path, checkpoint_every=10)
+        stopped.load_jobs(jobs)
+        stopped.run_model(node_limit=30)
+        assert stopped.stopped
+
+        resumed = IterativeSolution(8, order)
+        resumed.resume_model(path)
+        assert not resumed.stopped
+        assert resumed.optimal_height == full.optimal_height
+        assert [(job['width'], job['height']) for job in resumed.jobs] == \
+            [(job['width'], job['height']) for job in jobs]
+        placed = resumed.placements()
+        assert all(x + job['width'] <= 8 for job, (x, y) in zip(jobs, placed))
+        assert max(y + job['height'] for job, (x, y) in zip(jobs, placed)) == full.optimal_height